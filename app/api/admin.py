@@ -0,0 +1,32 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.config import get_settings
+from app.services.rule_catalog import RuleCatalogError, configured_rules_path, current_catalog, reload_catalog
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    token = get_settings().admin_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/rules", dependencies=[Depends(require_admin)])
+async def get_rules() -> dict:
+    return {"version": current_catalog().version, "path": str(configured_rules_path())}
+
+
+@router.post("/rules/reload", dependencies=[Depends(require_admin)])
+async def reload_rules() -> dict:
+    previous = current_catalog().version
+    try:
+        changed = reload_catalog()
+    except RuleCatalogError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return {"version": current_catalog().version, "previous_version": previous, "changed": changed}
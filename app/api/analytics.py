@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.metrics import TimedRoute
+from app.api.routes import get_repository
+from app.models.schemas import (
+    ClimateProfile,
+    Dimension,
+    ItemFrequencies,
+    Priority,
+    Season,
+    ShapeHistogram,
+    TopItems,
+    TravelMode,
+    TravelType,
+)
+from app.services.analytics import (
+    export_cursor,
+    item_frequencies,
+    iter_csv_export,
+    iter_ndjson_export,
+    shape_histogram,
+    top_items,
+    trip_match,
+)
+from app.services.checklist_repository import ChecklistRepository
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"], route_class=TimedRoute)
+
+
+def trip_filter(
+    origin_climate: Optional[ClimateProfile] = None,
+    destination_climate: Optional[ClimateProfile] = None,
+    season: Optional[Season] = None,
+    travel_type: Optional[TravelType] = None,
+    travel_mode: Optional[TravelMode] = None,
+    min_duration_days: Optional[int] = Query(None, gt=0),
+    max_duration_days: Optional[int] = Query(None, gt=0),
+    rules_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    return trip_match(
+        origin_climate,
+        destination_climate,
+        season,
+        travel_type,
+        travel_mode,
+        min_duration_days,
+        max_duration_days,
+        rules_version,
+    )
+
+
+@router.get("/items", response_model=ItemFrequencies)
+async def get_item_frequencies(
+    priority: Optional[Priority] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    match: Dict[str, Any] = Depends(trip_filter),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Dict[str, Any]:
+    return await item_frequencies(repo.collection, repo.contents.name, match, priority, limit)
+
+
+@router.get("/top-items", response_model=TopItems)
+async def get_top_items(
+    dimension: Dimension,
+    priority: Optional[Priority] = None,
+    k: int = Query(10, gt=0, le=100),
+    match: Dict[str, Any] = Depends(trip_filter),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Dict[str, Any]:
+    return await top_items(repo.collection, repo.contents.name, match, dimension, priority, k)
+
+
+@router.get("/shapes", response_model=ShapeHistogram)
+async def get_shape_histogram(
+    dimensions: List[Dimension] = Query(["travel_mode"]),
+    match: Dict[str, Any] = Depends(trip_filter),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Dict[str, Any]:
+    return await shape_histogram(repo.collection, match, list(dict.fromkeys(dimensions)))
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_checklists(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, gt=0),
+    match: Dict[str, Any] = Depends(trip_filter),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> StreamingResponse:
+    if after is not None and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=422, detail="after must be a record id from a previous export")
+    cursor = export_cursor(repo.collection, match, ObjectId(after) if after else None, limit)
+    if format == "csv":
+        return StreamingResponse(
+            iter_csv_export(cursor),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="checklists.csv"'},
+        )
+    return StreamingResponse(iter_ndjson_export(cursor), media_type="application/x-ndjson")
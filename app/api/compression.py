@@ -0,0 +1,149 @@
+import gzip
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.cache import LRUCache
+from app.services.metrics import span
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def _zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+def available_encoders() -> Dict[str, Callable[[bytes], bytes]]:
+    # Ordered by preference when the client accepts several encodings equally.
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = _zstd
+    if brotli is not None:
+        encoders["br"] = _brotli
+    encoders["gzip"] = _gzip
+    return encoders
+
+
+ENCODERS = available_encoders()
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header: Optional[str], encodings: Iterable[str] = ENCODERS) -> Optional[str]:
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best: Optional[Tuple[float, str]] = None
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, encoding)
+    return best[1] if best is not None else None
+
+
+def weak_etag(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Compresses single-body responses for clients that accept gzip, br or zstd.
+
+    Responses carrying an ETag are content-addressed, so their compressed bodies
+    are cached by (ETag, encoding). The ETag of an encoded response is sent as a
+    weak validator, which ``If-None-Match`` still matches. Streaming responses
+    are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, cache_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache: LRUCache[bytes] = LRUCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            response_start, start = start, None
+            if not message.get("more_body", False):
+                message = self.compress(response_start, message, encoding)
+            await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, start: Message, message: Message, encoding: Optional[str]) -> Message:
+        body = message.get("body", b"")
+        headers = MutableHeaders(scope=start)
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or "content-encoding" in headers:
+            return message
+        headers.add_vary_header("Accept-Encoding")
+        if encoding is None or len(body) < self.minimum_size:
+            return message
+        etag = headers.get("etag") if start["status"] == 200 else None
+        compressed = self.cache.get((etag, encoding)) if etag else None
+        if compressed is None:
+            with span("compression"):
+                compressed = ENCODERS[encoding](body)
+            if etag:
+                self.cache.put((etag, encoding), compressed)
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        if etag:
+            headers["ETag"] = weak_etag(etag)
+        return {**message, "body": compressed}
@@ -0,0 +1,134 @@
+import asyncio
+import functools
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+
+router = APIRouter(tags=["Metrics"])
+
+WRITE_BEHIND_STATS = metrics.registry.gauge(
+    "travelready_write_behind", "Write-behind queue counters and depth.", ("stat",)
+)
+PERSISTENCE_STATS = metrics.registry.gauge(
+    "travelready_persistence",
+    "MongoDB circuit breaker counters (state: 0 closed, 1 half open, 2 open) and spool backlog.",
+    ("stat",),
+)
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class _RouteClock:
+    __slots__ = ("started", "endpoint_finished")
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.endpoint_finished: Optional[float] = None
+
+
+_route_clock: ContextVar[Optional[_RouteClock]] = ContextVar("route_clock", default=None)
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if not asyncio.iscoroutinefunction(endpoint) or getattr(endpoint, "records_stages", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        clock = _route_clock.get()
+        if clock is None:
+            return await endpoint(*args, **kwargs)
+        metrics.record_stage("validation", perf_counter() - clock.started)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            clock.endpoint_finished = perf_counter()
+
+    timed.records_stages = True  # type: ignore[attr-defined]
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """Route that records request validation and response serialization as stages.
+
+    FastAPI validates the request before calling the endpoint and serializes the
+    returned value afterwards, so both are timed around the wrapped endpoint.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            if not metrics.active():
+                return await handler(request)
+            clock = _RouteClock()
+            token = _route_clock.set(clock)
+            try:
+                response = await handler(request)
+            finally:
+                _route_clock.reset(token)
+            if clock.endpoint_finished is not None:
+                metrics.record_stage("serialization", perf_counter() - clock.endpoint_finished)
+            return response
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not metrics.active():
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        status = 500
+        timings, token = metrics.start_request_timings()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if metrics.server_timing:
+                    total = ("total", perf_counter() - started)
+                    header = metrics.format_server_timing([*timings, total])
+                    MutableHeaders(scope=message).append("Server-Timing", header)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.finish_request_timings(token)
+            if metrics.enabled:
+                route = scope.get("route")
+                path = getattr(route, "path", "unmatched")
+                metrics.REQUEST_SECONDS.observe(perf_counter() - started, scope["method"], path, str(status))
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request) -> Response:
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    writer = getattr(request.app.state, "checklist_writer", None)
+    if writer is not None:
+        for stat, value in writer.stats().items():
+            WRITE_BEHIND_STATS.set(value, stat)
+    breaker = getattr(request.app.state, "breaker", None)
+    spool = getattr(request.app.state, "spool", None)
+    if breaker is not None and spool is not None:
+        stats = {**breaker.stats(), **spool.stats()}
+        stats["state"] = BREAKER_STATES[stats["state"]]
+        for stat, value in stats.items():
+            PERSISTENCE_STATS.set(value, stat)
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
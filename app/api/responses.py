@@ -0,0 +1,61 @@
+import json
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def render_json(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def render_json_fast(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return render_json(content)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def conditional_json_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    response_headers = {"ETag": etag, **(headers or {})}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """Streaming response whose body is produced while the request body is still being read.
+
+    Starlette's StreamingResponse listens for disconnects by consuming ``receive``,
+    which would swallow the request body chunks the iterator is reading.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
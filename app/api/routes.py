@@ -1,30 +1,277 @@
-from fastapi import APIRouter, Depends
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
 
-from app.models.schemas import ChecklistResponse, TripParameters
-from app.services.trip_analyzer import TripAnalyzer
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+
+from app.api.metrics import TimedRoute
+from app.api.responses import RequestStreamingResponse, conditional_json_response, etag_matches, render_json
+from app.config import get_settings
+from app.models.schemas import (
+    ChecklistItem,
+    ChecklistResponse,
+    ChecklistUpdate,
+    ClimateProfile,
+    DemographicFlag,
+    ItineraryParameters,
+    ItineraryResponse,
+    Priority,
+    Season,
+    TravelMode,
+    TravelType,
+    TripChanges,
+    TripParameters,
+)
+from app.services.batch import generate_batch, iter_json_array, iter_ndjson
+from app.services.cache import ReadThroughCache
+from app.services.checklist_render import render_checklist, render_shaped_checklist
+from app.services.metrics import span
+from app.services.response_shaping import NO_SHAPING, ShapingOptions, shape_response, shaping_options
+from app.services.rule_catalog import current_catalog
+from app.services.checklist_diff import checklist_delta, diff_checklists
+from app.services.trip_analyzer import (
+    TripAnalyzer,
+    TripShape,
+    build_checklist_response,
+    build_itinerary_response,
+    build_shape_response,
+    checklist_id,
+    duration_bucket,
+)
 from app.services.checklist_repository import ChecklistRepository
 
 
-router = APIRouter(prefix="/api/checklist", tags=["Checklist"])
+router = APIRouter(prefix="/api/checklist", tags=["Checklist"], route_class=TimedRoute)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CHECKLIST_ID_PATTERN = "^[0-9a-f]{64}$"
+
+
+class StoredChecklist(NamedTuple):
+    checklist_id: str
+    body: bytes
+    etag: str
+    response: Dict[str, Any]
+
+
+_settings = get_settings()
+_stored_checklists: ReadThroughCache[StoredChecklist] = ReadThroughCache(
+    _settings.read_cache_size, _settings.read_cache_ttl
+)
+
+
+def get_repository(request: Request) -> ChecklistRepository:
+    repository = getattr(request.app.state, "checklist_repository", None)
+    if repository is None:
+        repository = request.app.state.checklist_repository = ChecklistRepository(
+            writer=getattr(request.app.state, "checklist_writer", None)
+        )
+    return repository
+
+
+def shaping_query(
+    limit: Optional[int] = Query(None, gt=0),
+    categories: List[str] = Query([]),
+    min_priority: Optional[Priority] = None,
+    fields: List[str] = Query([]),
+    summary: bool = False,
+) -> ShapingOptions:
+    try:
+        return shaping_options(limit, categories, min_priority, fields, summary)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def lookup_shape(
+    origin_climate: ClimateProfile,
+    destination_climate: ClimateProfile,
+    season: Season,
+    travel_type: TravelType,
+    travel_mode: TravelMode,
+    duration_days: int = Query(..., gt=0),
+    demographics: List[DemographicFlag] = Query([]),
+) -> TripShape:
+    return TripShape(
+        origin_climate=origin_climate,
+        destination_climate=destination_climate,
+        season=season,
+        travel_type=travel_type,
+        travel_mode=travel_mode,
+        duration_bucket=duration_bucket(duration_days),
+        demographic_flags=frozenset(demographics),
+    )
+
+
+def checklist_etag(content_id: str, options: ShapingOptions) -> str:
+    if not options.active:
+        return f'"{content_id}"'
+    return f'"{content_id}-{options.etag_suffix()}"'
+
+
+async def _load_checklist(repo: ChecklistRepository, content_id: str) -> Optional[StoredChecklist]:
+    async def load() -> Optional[StoredChecklist]:
+        with span("load"):
+            document = await repo.find_content(content_id)
+        if document is None:
+            return None
+        response = document["response"]
+        return StoredChecklist(content_id, render_json(response), checklist_etag(content_id, NO_SHAPING), response)
 
+    return await _stored_checklists.get(content_id, load)
 
-def get_repository() -> ChecklistRepository:
-    return ChecklistRepository()
+
+def _stored_checklist_response(
+    request: Request,
+    stored: Optional[StoredChecklist],
+    options: ShapingOptions,
+) -> Response:
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Checklist not found")
+    headers = {"X-Checklist-Id": stored.checklist_id}
+    if not options.active:
+        return conditional_json_response(request, stored.body, stored.etag, headers)
+    etag = checklist_etag(stored.checklist_id, options)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, **headers})
+    body = render_json(shape_response(stored.response, options))
+    return conditional_json_response(request, body, etag, headers)
 
 
 @router.post("/generate", response_model=ChecklistResponse)
 async def generate_checklist(
     trip: TripParameters,
+    request: Request,
+    response: Response,
+    options: ShapingOptions = Depends(shaping_query),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Union[ChecklistResponse, Response]:
+    catalog = current_catalog()
+    shape = TripShape.from_parameters(trip, catalog)
+    content_id = checklist_id(shape, catalog.version)
+    headers = {
+        "ETag": checklist_etag(content_id, options),
+        "X-Checklist-Id": content_id,
+        "X-Rules-Version": catalog.version,
+    }
+    lazy_content = partial(render_checklist, shape, catalog)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        with span("save"):
+            await repo.save_checklist(trip, lazy_content, catalog)
+        return Response(status_code=304, headers=headers)
+    store = getattr(request.app.state, "response_store", None)
+    body: Union[bytes, memoryview, None] = None
+    content: Union[bytes, memoryview, Callable[[], bytes], None] = None
+    if options.active:
+        body = render_shaped_checklist(shape, options, catalog)
+        content = lazy_content
+    if body is None and store is not None and store.rules_version == catalog.version:
+        body = store.get(shape)
+    if body is None and getattr(request.app.state, "fast_responses", False):
+        body = render_checklist(shape, catalog)
+    if body is not None:
+        with span("save"):
+            await repo.save_checklist(trip, content or body, catalog)
+        return Response(content=body, media_type="application/json", headers=headers)
+    checklist = build_checklist_response(trip, catalog)
+    with span("save"):
+        await repo.save_checklist(trip, checklist, catalog)
+    response.headers.update(headers)
+    return checklist
+
+
+@router.post("/generate-itinerary", response_model=ItineraryResponse)
+async def generate_itinerary_checklist(
+    itinerary: ItineraryParameters,
+    response: Response,
+    repo: ChecklistRepository = Depends(get_repository),
+) -> ItineraryResponse:
+    catalog = current_catalog()
+    checklist = build_itinerary_response(itinerary, catalog)
+    with span("save"):
+        response.headers["X-Checklist-Id"] = await repo.save_itinerary(itinerary, checklist, catalog)
+    response.headers["X-Rules-Version"] = catalog.version
+    return checklist
+
+
+@router.post("/generate-batch", response_class=RequestStreamingResponse)
+async def generate_checklist_batch(
+    request: Request,
+    repo: ChecklistRepository = Depends(get_repository),
+) -> RequestStreamingResponse:
+    settings = get_settings()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        records = iter_ndjson(request.stream())
+    else:
+        records = iter_json_array(request.stream())
+    return RequestStreamingResponse(
+        generate_batch(records, repo, settings.batch_dedupe_size, settings.batch_write_size)
+    )
+
+
+@router.get("/lookup", response_model=ChecklistResponse)
+async def lookup_checklist(
+    request: Request,
+    shape: TripShape = Depends(lookup_shape),
+    options: ShapingOptions = Depends(shaping_query),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Response:
+    stored = await _load_checklist(repo, checklist_id(shape))
+    return _stored_checklist_response(request, stored, options)
+
+
+@router.get("/{checklist_id}", response_model=ChecklistResponse)
+async def get_checklist(
+    request: Request,
+    content_id: str = Path(..., alias="checklist_id", pattern=CHECKLIST_ID_PATTERN),
+    options: ShapingOptions = Depends(shaping_query),
+    repo: ChecklistRepository = Depends(get_repository),
+) -> Response:
+    stored = await _load_checklist(repo, content_id)
+    return _stored_checklist_response(request, stored, options)
+
+
+@router.patch("/{checklist_id}", response_model=ChecklistUpdate)
+async def update_checklist(
+    changes: TripChanges,
+    response: Response,
+    base_id: str = Path(..., alias="checklist_id", pattern=CHECKLIST_ID_PATTERN),
     repo: ChecklistRepository = Depends(get_repository),
-) -> ChecklistResponse:
-    analyzer = TripAnalyzer(trip)
-    items = analyzer.generate_checklist()
-    response = ChecklistResponse(
-        destination=trip.destination_climate,
-        trip_type=trip.travel_type,
-        travel_mode=trip.travel_mode,
-        climate=trip.destination_climate,
-        items=items,
+) -> ChecklistUpdate:
+    with span("load"):
+        base = await repo.find_content(base_id)
+    if base is None:
+        raise HTTPException(status_code=404, detail="Checklist not found")
+    if "legs" in base["shape"]:
+        raise HTTPException(status_code=422, detail="Itinerary checklists cannot be updated")
+    catalog = current_catalog()
+    previous_shape = TripShape.from_document(base["shape"])
+    shape = previous_shape.with_changes(changes, catalog)
+    previous_items = [ChecklistItem.construct(**item) for item in base["response"]["items"]]
+    with span("rules"):
+        analyzer = TripAnalyzer(catalog=catalog, shape=shape)
+        if base["rules_version"] != catalog.version:
+            items = analyzer.generate_checklist()
+        else:
+            items = analyzer.regenerate(previous_shape, previous_items)
+    with span("response_model"):
+        checklist = build_shape_response(shape, items)
+        diff = diff_checklists(previous_items, items)
+    with span("save"):
+        content_id = await repo.save_revision(
+            base,
+            shape,
+            checklist,
+            checklist_delta(previous_items, items),
+            changes.dict(exclude_unset=True),
+            diff.dict(),
+            catalog,
+        )
+    response.headers["X-Checklist-Id"] = content_id
+    response.headers["X-Rules-Version"] = catalog.version
+    return ChecklistUpdate(
+        checklist_id=content_id,
+        base_checklist_id=base_id,
+        rules_version=catalog.version,
+        checklist=checklist,
+        diff=diff,
     )
-    await repo.save_checklist(trip, response)
-    return response
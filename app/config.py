@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal, Optional
+
 from pydantic import BaseSettings, Field
 
 
@@ -5,10 +8,53 @@ class Settings(BaseSettings):
     app_name: str = Field("Travel Ready Service")
     mongodb_uri: str = Field("mongodb://localhost:27017")
     mongodb_db: str = Field("travelready")
+    mongodb_max_pool_size: int = Field(100, ge=0)
+    mongodb_min_pool_size: int = Field(0, ge=0)
+    mongodb_max_idle_time_ms: Optional[int] = Field(None, gt=0)
+    mongodb_wait_queue_timeout_ms: Optional[int] = Field(None, gt=0)
+    mongodb_connect_timeout_ms: int = Field(20000, gt=0)
+    mongodb_server_selection_timeout_ms: int = Field(30000, gt=0)
+    mongodb_socket_timeout_ms: Optional[int] = Field(None, gt=0)
+    mongodb_compressors: Optional[str] = Field(None)
+    mongodb_zlib_compression_level: Optional[int] = Field(None, ge=-1, le=9)
+    startup_warmup: bool = Field(True)
+    startup_warmup_timeout: float = Field(10.0, gt=0)
+    checklist_cache_size: int = Field(4096, ge=0)
+    checklist_write_mode: Literal["sync", "write_behind"] = Field("sync")
+    write_behind_queue_size: int = Field(10000, gt=0)
+    write_behind_batch_size: int = Field(500, gt=0)
+    write_behind_flush_interval: float = Field(0.5, gt=0)
+    write_behind_overflow: Literal["block", "drop_oldest", "spill"] = Field("block")
+    write_behind_spill_path: str = Field("checklists.spill.jsonl")
+    breaker_enabled: bool = Field(True)
+    breaker_error_threshold: int = Field(5, gt=0)
+    breaker_latency_threshold: float = Field(1.0, gt=0)
+    breaker_call_timeout: float = Field(2.0, gt=0)
+    breaker_reset_timeout: float = Field(10.0, gt=0)
+    spool_path: str = Field("checklists.spool.jsonl")
+    spool_replay_interval: float = Field(5.0, gt=0)
+    spool_replay_batch_size: int = Field(500, gt=0)
+    batch_dedupe_size: int = Field(1024, ge=0)
+    batch_write_size: int = Field(500, gt=0)
+    read_cache_size: int = Field(1024, ge=0)
+    read_cache_ttl: float = Field(300.0, gt=0)
+    rules_path: Optional[str] = Field(None)
+    rules_watch_interval: float = Field(0.0, ge=0)
+    admin_token: Optional[str] = Field(None)
+    fast_responses: bool = Field(False)
+    response_store_path: Optional[str] = Field(None)
+    metrics_enabled: bool = Field(False)
+    server_timing: bool = Field(False)
+    compression_enabled: bool = Field(True)
+    compression_minimum_size: int = Field(1024, ge=0)
+    compression_cache_size: int = Field(1024, ge=0)
+    analytics_max_time_ms: int = Field(30000, gt=0)
+    export_batch_size: int = Field(1000, gt=0)
 
     class Config:
         env_file = ".env"
 
 
+@lru_cache()
 def get_settings() -> Settings:
     return Settings()
@@ -1,16 +1,55 @@
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from typing import Any, Dict, Optional
 
-from app.config import get_settings
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+from app.config import Settings, get_settings
+from app.services.metrics import mongo_listeners
+
+
+def client_options(settings: Settings) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "appname": settings.app_name,
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongodb_socket_timeout_ms,
+        "compressors": settings.mongodb_compressors,
+        "zlibCompressionLevel": settings.mongodb_zlib_compression_level,
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    options["event_listeners"] = mongo_listeners()
+    return options
 
 
 class Database:
     def __init__(self) -> None:
-        settings = get_settings()
-        self.client = AsyncIOMotorClient(settings.mongodb_uri)
-        self.db = self.client[settings.mongodb_db]
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
 
-    def get_database(self) -> AsyncIOMotorDatabase:
+    def connect(self) -> AsyncIOMotorDatabase:
+        if self.db is None:
+            settings = get_settings()
+            self.client = AsyncIOMotorClient(settings.mongodb_uri, **client_options(settings))
+            self.db = self.client[settings.mongodb_db]
         return self.db
 
+    def get_database(self) -> AsyncIOMotorDatabase:
+        return self.connect()
+
+    def get_collection(self, name: str) -> AsyncIOMotorCollection:
+        return self.connect().get_collection(name)
+
+    async def ping(self) -> None:
+        await self.connect().command("ping")
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+
 
-database = Database().get_database()
+database = Database()
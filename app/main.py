@@ -1,15 +1,198 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.admin import router as admin_router
+from app.api.analytics import router as analytics_router
+from app.api.compression import CompressionMiddleware
+from app.api.metrics import MetricsMiddleware
+from app.api.metrics import router as metrics_router
+from app.api.responses import render_json
 from app.api.routes import router as checklist_router
 from app.config import get_settings
+from app.db import database
+from app.models.schemas import TravelerProfile, TripParameters
+from app.services.checklist_render import render_checklist
+from app.services.checklist_repository import ChecklistRepository, PersistenceUnavailableError
+from app.services.circuit_breaker import CLOSED, CircuitBreaker
+from app.services.response_store import ResponseStore, ResponseStoreError
+from app.services.rule_catalog import configured_rules_path, current_catalog, watch_catalog
+from app.services.spool import PersistenceSpool
+from app.services.trip_analyzer import TripShape, build_checklist_response
+from app.services.write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name)
+WARMUP_TRIP = TripParameters(
+    origin_climate="temperate",
+    destination_climate="tropical",
+    duration_days=10,
+    season="summer",
+    travel_type="family",
+    travel_mode="air",
+    traveler_demographics=[TravelerProfile(age_group="senior"), TravelerProfile(age_group="child")],
+)
+
+
+async def ensure_indexes(repository: ChecklistRepository) -> None:
+    try:
+        await repository.ensure_indexes()
+    except Exception:
+        logger.exception("Creating checklist indexes failed")
+
+
+def warm_up_rules() -> None:
+    catalog = current_catalog()
+    render_json(jsonable_encoder(build_checklist_response(WARMUP_TRIP, catalog)))
+    if settings.fast_responses:
+        render_checklist(TripShape.from_parameters(WARMUP_TRIP, catalog), catalog)
+
+
+async def warm_up_database(repository: ChecklistRepository) -> None:
+    connections = max(1, settings.mongodb_min_pool_size)
+    await asyncio.gather(*(database.ping() for _ in range(connections)))
+    await repository.ensure_indexes()
+
+
+async def warm_up(repository: ChecklistRepository) -> None:
+    started = time.perf_counter()
+    warm_up_rules()
+    try:
+        await asyncio.wait_for(warm_up_database(repository), settings.startup_warmup_timeout)
+    except asyncio.TimeoutError:
+        logger.warning("MongoDB warm-up did not finish within %.1fs", settings.startup_warmup_timeout)
+    except Exception:
+        logger.exception("MongoDB warm-up failed, continuing startup")
+    logger.info("Warm-up finished in %.3fs", time.perf_counter() - started)
+
+
+def open_response_store() -> Optional[ResponseStore]:
+    if not settings.response_store_path:
+        return None
+    try:
+        store = ResponseStore(settings.response_store_path)
+    except ResponseStoreError:
+        logger.exception("Serving /generate without the precomputed response store")
+        return None
+    logger.info(
+        "Loaded %d precomputed responses for %d trip shapes (rules version %s)",
+        store.blobs,
+        store.shapes,
+        store.rules_version,
+    )
+    return store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    database.connect()
+    breaker = spool = None
+    if settings.breaker_enabled:
+        breaker = CircuitBreaker(
+            error_threshold=settings.breaker_error_threshold,
+            latency_threshold=settings.breaker_latency_threshold,
+            call_timeout=settings.breaker_call_timeout,
+            reset_timeout=settings.breaker_reset_timeout,
+        )
+        spool = PersistenceSpool(
+            settings.spool_path,
+            database.get_collection("checklists"),
+            database.get_collection("checklist_contents"),
+            breaker,
+            batch_size=settings.spool_replay_batch_size,
+        )
+    writer = None
+    if settings.checklist_write_mode == "write_behind":
+        writer = WriteBehindQueue(
+            database.get_collection("checklists"),
+            max_size=settings.write_behind_queue_size,
+            batch_size=settings.write_behind_batch_size,
+            flush_interval=settings.write_behind_flush_interval,
+            overflow=settings.write_behind_overflow,
+            spill_path=settings.write_behind_spill_path,
+            breaker=breaker,
+            spool=spool,
+        )
+        await writer.start()
+    repository = ChecklistRepository(writer=writer, breaker=breaker, spool=spool)
+    app.state.checklist_writer = writer
+    app.state.breaker = breaker
+    app.state.spool = spool
+    app.state.checklist_repository = repository
+    app.state.response_store = open_response_store()
+    app.state.fast_responses = settings.fast_responses
+    indexes = None
+    if settings.startup_warmup:
+        await warm_up(repository)
+    else:
+        indexes = asyncio.create_task(ensure_indexes(repository))
+    watcher = None
+    if settings.rules_watch_interval > 0:
+        watcher = asyncio.create_task(watch_catalog(configured_rules_path(), settings.rules_watch_interval))
+    replay = None
+    if spool is not None:
+        if spool.backlog:
+            logger.warning("%d writes are waiting in the persistence spool", spool.backlog)
+        replay = asyncio.create_task(spool.run(settings.spool_replay_interval))
+    try:
+        yield
+    finally:
+        if indexes is not None:
+            indexes.cancel()
+        if watcher is not None:
+            watcher.cancel()
+        if replay is not None:
+            replay.cancel()
+        if writer is not None:
+            await writer.stop()
+        if app.state.response_store is not None:
+            app.state.response_store.close()
+        database.close()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.include_router(checklist_router)
+app.include_router(admin_router)
+app.include_router(analytics_router)
+app.include_router(metrics_router)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        cache_size=settings.compression_cache_size,
+    )
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PersistenceUnavailableError)
+async def persistence_unavailable(request: Request, exc: PersistenceUnavailableError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(settings.breaker_reset_timeout))},
+    )
 
 
 @app.get("/health")
 async def health() -> dict:
-    return {"status": "ok"}
+    status: Dict[str, Any] = {"status": "ok"}
+    breaker = getattr(app.state, "breaker", None)
+    spool = getattr(app.state, "spool", None)
+    if breaker is not None and spool is not None:
+        if breaker.state != CLOSED or spool.backlog:
+            status["status"] = "degraded"
+        status["persistence"] = {"breaker": breaker.stats(), "spool": spool.stats()}
+    writer = getattr(app.state, "checklist_writer", None)
+    if writer is not None:
+        status["write_behind"] = writer.stats()
+    return status
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -13,6 +13,17 @@ TravelType = Literal[
 
 TravelMode = Literal["air", "car", "train", "cruise"]
 ClimateProfile = Literal["tropical", "cold", "desert", "temperate"]
+Season = Literal["spring", "summer", "fall", "winter"]
+DemographicFlag = Literal["senior", "special_needs", "child"]
+Priority = Literal["critical", "high", "medium", "nice-to-have"]
+Dimension = Literal[
+    "origin_climate",
+    "destination_climate",
+    "season",
+    "travel_type",
+    "travel_mode",
+    "duration_bucket",
+]
 
 
 class TravelerProfile(BaseModel):
@@ -26,19 +37,34 @@ class TripParameters(BaseModel):
     origin_climate: ClimateProfile
     destination_climate: ClimateProfile
     duration_days: int = Field(..., gt=0)
-    season: Literal["spring", "summer", "fall", "winter"]
+    season: Season
     travel_type: TravelType
     travel_mode: TravelMode
     traveler_demographics: List[TravelerProfile] = Field(default_factory=list)
     travel_start: Optional[date] = None
 
 
+class TripLeg(BaseModel):
+    origin_climate: ClimateProfile
+    destination_climate: ClimateProfile
+    duration_days: int = Field(..., gt=0)
+    travel_mode: TravelMode
+
+
+class ItineraryParameters(BaseModel):
+    season: Season
+    travel_type: TravelType
+    legs: List[TripLeg] = Field(..., min_items=1, max_items=20)
+    traveler_demographics: List[TravelerProfile] = Field(default_factory=list)
+    travel_start: Optional[date] = None
+
+
 class ChecklistItem(BaseModel):
     name: str
     category: str
     score: float
     rationale: List[str]
-    priority: Literal["critical", "high", "medium", "nice-to-have"]
+    priority: Priority
 
 
 class ChecklistResponse(BaseModel):
@@ -47,3 +73,88 @@ class ChecklistResponse(BaseModel):
     travel_mode: TravelMode
     climate: ClimateProfile
     items: List[ChecklistItem]
+
+
+class ItineraryResponse(BaseModel):
+    trip_type: TravelType
+    legs: List[TripLeg]
+    items: List[ChecklistItem]
+
+
+class TripChanges(BaseModel):
+    origin_climate: Optional[ClimateProfile] = None
+    destination_climate: Optional[ClimateProfile] = None
+    duration_days: Optional[int] = Field(None, gt=0)
+    season: Optional[Season] = None
+    travel_type: Optional[TravelType] = None
+    travel_mode: Optional[TravelMode] = None
+    traveler_demographics: Optional[List[TravelerProfile]] = None
+
+
+class ScoreChange(BaseModel):
+    name: str
+    previous_score: float
+    score: float
+
+
+class PriorityChange(BaseModel):
+    name: str
+    previous_priority: Priority
+    priority: Priority
+
+
+class ChecklistDiff(BaseModel):
+    added: List[ChecklistItem] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+    rescored: List[ScoreChange] = Field(default_factory=list)
+    reprioritized: List[PriorityChange] = Field(default_factory=list)
+
+
+class ChecklistUpdate(BaseModel):
+    checklist_id: str
+    base_checklist_id: str
+    rules_version: str
+    checklist: ChecklistResponse
+    diff: ChecklistDiff
+
+
+class ItemFrequency(BaseModel):
+    name: str
+    priority: Priority
+    trips: int
+    share: float
+
+
+class ItemFrequencies(BaseModel):
+    trips: int
+    items: List[ItemFrequency]
+
+
+class ItemCount(BaseModel):
+    name: str
+    trips: int
+    share: float
+
+
+class DimensionItems(BaseModel):
+    value: Union[int, str, None]
+    trips: int
+    items: List[ItemCount]
+
+
+class TopItems(BaseModel):
+    dimension: Dimension
+    priority: Optional[Priority] = None
+    groups: List[DimensionItems]
+
+
+class ShapeCount(BaseModel):
+    shape: Dict[str, Union[int, str, None]]
+    trips: int
+    share: float
+
+
+class ShapeHistogram(BaseModel):
+    dimensions: List[Dimension]
+    trips: int
+    shapes: List[ShapeCount]
@@ -0,0 +1,274 @@
+"""Regenerate checklists for stored or exported trips across all CPU cores.
+
+Trips are read from the ``checklists`` collection with a batched cursor, or from a
+JSONL file whose lines are trip parameters or ``{"_id": ..., "trip": {...}}``
+records. Chunks of trips are generated in a pool of worker processes. The results
+are written back with unordered bulk upserts: content documents into
+``checklist_contents``, and the new checklist id into each ``checklists`` record.
+Records whose checklist id is unchanged are left alone.
+
+With ``--checkpoint``, progress is saved after every written chunk and a rerun
+resumes after the last one, unless the rules version has changed. ``--dry-run``
+writes the results to a JSONL file instead of MongoDB.
+
+    python -m app.scripts.backfill_checklists [--input trips.jsonl] [--workers 8]
+        [--chunk-size 500] [--checkpoint backfill.checkpoint] [--dry-run --output results.jsonl]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+from bson import json_util
+from pydantic import ValidationError
+from pymongo import ASCENDING, InsertOne, MongoClient, UpdateOne
+
+from app.config import get_settings
+from app.models.schemas import TripParameters
+from app.scripts.migrate_checklists import write_unordered
+from app.services.checklist_repository import content_document
+from app.services.rule_catalog import configured_rules_path, current_catalog, install_catalog, load_catalog
+from app.services.spool import content_update
+from app.services.trip_analyzer import TripShape, build_checklist_response, checklist_id
+
+
+class SourceRecord(NamedTuple):
+    key: Any
+    record_id: Any
+    trip: Dict[str, Any]
+    checklist_id: Optional[str]
+
+
+ChunkResult = Tuple[List[Optional[str]], Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]]
+
+
+def _init_worker(rules_path: str) -> None:
+    install_catalog(load_catalog(rules_path))
+
+
+def generate_chunk(trips: List[Dict[str, Any]]) -> ChunkResult:
+    catalog = current_catalog()
+    content_ids: List[Optional[str]] = []
+    contents: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    for trip_document in trips:
+        try:
+            trip = TripParameters.parse_obj(trip_document)
+        except ValidationError:
+            content_ids.append(None)
+            continue
+        shape = TripShape.from_parameters(trip, catalog)
+        content_id = checklist_id(shape, catalog.version)
+        if content_id not in contents:
+            contents[content_id] = (shape.to_document(), build_checklist_response(trip, catalog).dict())
+        content_ids.append(content_id)
+    return content_ids, contents
+
+
+def mongo_records(records: Any, after: Any, batch_size: int) -> Iterator[SourceRecord]:
+    query: Dict[str, Any] = {"trip": {"$exists": True}}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    cursor = records.find(query, {"trip": 1, "checklist_id": 1}, batch_size=batch_size).sort("_id", ASCENDING)
+    for document in cursor:
+        yield SourceRecord(document["_id"], document["_id"], document["trip"] or {}, document.get("checklist_id"))
+
+
+def jsonl_records(path: Path, after: Optional[int]) -> Iterator[SourceRecord]:
+    with path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if (after is not None and line_number <= after) or not line.strip():
+                continue
+            try:
+                document = json_util.loads(line)
+            except ValueError:
+                document = {}
+            if not isinstance(document, dict):
+                document = {}
+            trip = document.get("trip", document)
+            yield SourceRecord(line_number, document.get("_id"), trip if isinstance(trip, dict) else {}, None)
+
+
+def chunked(records: Iterator[SourceRecord], size: int) -> Iterator[List[SourceRecord]]:
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_checkpoint(path: Optional[Path], source: str, rules_version: str) -> Dict[str, Any]:
+    if path is None or not path.exists():
+        return {}
+    checkpoint = json_util.loads(path.read_text(encoding="utf-8"))
+    if checkpoint.get("source") != source or checkpoint.get("rules_version") != rules_version:
+        print(f"ignoring checkpoint {path}: it was written for another source or rules version", file=sys.stderr)
+        return {}
+    return checkpoint
+
+
+def save_checkpoint(path: Path, checkpoint: Dict[str, Any]) -> None:
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(json_util.dumps(checkpoint), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+class Backfill:
+    def __init__(
+        self,
+        rules_version: str,
+        records: Any = None,
+        contents: Any = None,
+        output: Optional[TextIO] = None,
+    ) -> None:
+        self.rules_version = rules_version
+        self.records = records
+        self.contents = contents
+        self.output = output
+        self.created_at = datetime.now(timezone.utc)
+        self.stored: Set[str] = set()
+        self.counts = {"processed": 0, "skipped": 0, "unchanged": 0, "contents": 0}
+
+    def write(self, chunk: List[SourceRecord], result: ChunkResult) -> None:
+        content_ids, contents = result
+        content_ops = []
+        for content_id, (shape_document, response_document) in contents.items():
+            if content_id in self.stored:
+                continue
+            self.stored.add(content_id)
+            shape = TripShape.from_document(shape_document)
+            document = content_document(shape, response_document, self.created_at, self.rules_version)
+            content_ops.append(UpdateOne({"_id": content_id}, content_update(document), upsert=True))
+        record_ops: List[Any] = []
+        for record, content_id in zip(chunk, content_ids):
+            self.counts["processed"] += 1
+            if content_id is None:
+                self.counts["skipped"] += 1
+                continue
+            if record.checklist_id == content_id:
+                self.counts["unchanged"] += 1
+                continue
+            if self.output is not None:
+                self.output.write(
+                    json_util.dumps(
+                        {
+                            "_id": record.record_id,
+                            "checklist_id": content_id,
+                            "rules_version": self.rules_version,
+                            "trip": record.trip,
+                            "response": contents[content_id][1],
+                        }
+                    )
+                    + "\n"
+                )
+                continue
+            update = {"checklist_id": content_id, "rules_version": self.rules_version}
+            if record.record_id is None:
+                record_ops.append(InsertOne({**update, "created_at": self.created_at, "trip": record.trip}))
+            else:
+                record_ops.append(
+                    UpdateOne(
+                        {"_id": record.record_id},
+                        {"$set": update, "$setOnInsert": {"created_at": self.created_at, "trip": record.trip}},
+                        upsert=True,
+                    )
+                )
+        self.counts["contents"] += len(content_ops)
+        if self.output is None:
+            write_unordered(self.contents, content_ops)
+            write_unordered(self.records, record_ops)
+
+
+def run(
+    source: Iterator[SourceRecord],
+    backfill: Backfill,
+    rules_path: str,
+    workers: int,
+    chunk_size: int,
+    checkpoint_path: Optional[Path],
+    checkpoint: Dict[str, Any],
+) -> Dict[str, int]:
+    started = time.perf_counter()
+    pending: Deque[Tuple[List[SourceRecord], "Future[ChunkResult]"]] = deque()
+    chunks = chunked(source, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules_path,)) as pool:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append((chunk, pool.submit(generate_chunk, [record.trip for record in chunk])))
+            if not pending:
+                break
+            chunk, future = pending.popleft()
+            backfill.write(chunk, future.result())
+            if checkpoint_path is not None:
+                checkpoint["last_key"] = chunk[-1].key
+                checkpoint["processed"] = checkpoint.get("processed", 0) + len(chunk)
+                save_checkpoint(checkpoint_path, checkpoint)
+            elapsed = time.perf_counter() - started
+            counts = backfill.counts
+            print(
+                f"processed {counts['processed']} trips ({counts['processed'] / elapsed:.0f}/s), "
+                f"{counts['skipped']} invalid, {counts['unchanged']} unchanged, {counts['contents']} content documents",
+                file=sys.stderr,
+            )
+    return backfill.counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", type=Path, help="JSONL file of trips instead of the checklists collection")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Trips per work unit")
+    parser.add_argument("--read-batch-size", type=int, default=1000, help="Cursor batch size for MongoDB reads")
+    parser.add_argument("--checkpoint", type=Path, help="File to save progress to and resume from")
+    parser.add_argument("--dry-run", action="store_true", help="Write results to --output instead of MongoDB")
+    parser.add_argument("--output", type=Path, default=Path("backfill.jsonl"))
+    args = parser.parse_args()
+
+    settings = get_settings()
+    rules_path = str(configured_rules_path().resolve())
+    catalog = current_catalog()
+    source_name = str(args.input.resolve()) if args.input else f"{settings.mongodb_db}.checklists"
+    checkpoint = load_checkpoint(args.checkpoint, source_name, catalog.version)
+    checkpoint.update({"source": source_name, "rules_version": catalog.version})
+    if "last_key" in checkpoint:
+        print(f"resuming after {checkpoint['last_key']}", file=sys.stderr)
+
+    client = MongoClient(settings.mongodb_uri) if not (args.dry_run and args.input) else None
+    database = client[settings.mongodb_db] if client is not None else None
+    output = args.output.open("a" if "last_key" in checkpoint else "w", encoding="utf-8") if args.dry_run else None
+    try:
+        if args.input:
+            source = jsonl_records(args.input, checkpoint.get("last_key"))
+        else:
+            records = database.get_collection("checklists")
+            source = mongo_records(records, checkpoint.get("last_key"), args.read_batch_size)
+        backfill = Backfill(
+            catalog.version,
+            records=database.get_collection("checklists") if database is not None else None,
+            contents=database.get_collection("checklist_contents") if database is not None else None,
+            output=output,
+        )
+        counts = run(source, backfill, rules_path, args.workers, args.chunk_size, args.checkpoint, checkpoint)
+    finally:
+        if output is not None:
+            output.close()
+        if client is not None:
+            client.close()
+    target = args.output if args.dry_run else "MongoDB"
+    print(
+        f"regenerated {counts['processed'] - counts['skipped'] - counts['unchanged']} checklists into {target}, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} invalid trips, {counts['contents']} content documents"
+    )
+
+
+if __name__ == "__main__":
+    main()
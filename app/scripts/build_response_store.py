@@ -0,0 +1,37 @@
+"""Precompute /api/checklist/generate responses for every trip shape.
+
+Renders the JSON body for each combination of climates, season, travel type and
+mode, duration bucket and demographic flags under the current rule catalog, and
+writes them to a memory-mappable file. Point RESPONSE_STORE_PATH at the file to
+serve those responses without generating them. Rebuild after every rules change;
+a store built for another rules version is ignored.
+
+    python -m app.scripts.build_response_store [--output responses.store]
+"""
+
+import argparse
+import sys
+
+from app.services.response_store import build_response_store
+from app.services.rule_catalog import current_catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="responses.store")
+    args = parser.parse_args()
+
+    catalog = current_catalog()
+    counts = build_response_store(
+        args.output,
+        catalog,
+        progress=lambda done, total: print(f"rendered {done}/{total} trip shapes", file=sys.stderr),
+    )
+    print(
+        f"wrote {counts['shapes']} trip shapes as {counts['blobs']} distinct responses "
+        f"({counts['bytes']} bytes, rules version {catalog.version}) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Convert legacy checklist documents to content-addressed storage.
+
+Legacy documents in ``checklists`` embed the full ``response``. Each one is rewritten
+into a request record that references a shared ``checklist_contents`` document by
+content hash. Content is regenerated from the stored trip so that it always matches
+its hash.
+
+    python -m app.scripts.migrate_checklists [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+from pydantic import ValidationError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.models.schemas import TripParameters
+from app.services.checklist_repository import content_document
+from app.services.rule_catalog import current_catalog
+from app.services.trip_analyzer import TripShape, build_checklist_response, checklist_id
+from app.services.write_behind import DUPLICATE_KEY_ERROR
+
+
+def write_unordered(collection: Any, operations: List[Any]) -> None:
+    if not operations:
+        return
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+
+
+def migrate(records: Any, contents: Any, batch_size: int, dry_run: bool) -> Dict[str, int]:
+    catalog = current_catalog()
+    counts = {"migrated": 0, "skipped": 0, "contents": 0}
+    seen = set()
+    content_ops: List[UpdateOne] = []
+    record_ops: List[UpdateOne] = []
+    cursor = records.find({"response": {"$exists": True}}, {"trip": 1}, batch_size=batch_size)
+    for document in cursor:
+        try:
+            trip = TripParameters.parse_obj(document.get("trip") or {})
+        except ValidationError:
+            counts["skipped"] += 1
+            continue
+        shape = TripShape.from_parameters(trip, catalog)
+        content_id = checklist_id(shape, catalog.version)
+        created_at = document["_id"].generation_time
+        if content_id not in seen:
+            seen.add(content_id)
+            response = build_checklist_response(trip, catalog)
+            content_ops.append(
+                UpdateOne(
+                    {"_id": content_id},
+                    {"$setOnInsert": content_document(shape, response.dict(), created_at, catalog.version)},
+                    upsert=True,
+                )
+            )
+            counts["contents"] += 1
+        record_ops.append(
+            UpdateOne(
+                {"_id": document["_id"]},
+                {
+                    "$set": {"checklist_id": content_id, "rules_version": catalog.version, "created_at": created_at},
+                    "$unset": {"response": ""},
+                },
+            )
+        )
+        counts["migrated"] += 1
+        if len(record_ops) >= batch_size:
+            if not dry_run:
+                write_unordered(contents, content_ops)
+                write_unordered(records, record_ops)
+            content_ops, record_ops = [], []
+            print(f"migrated {counts['migrated']} checklists", file=sys.stderr)
+    if not dry_run:
+        write_unordered(contents, content_ops)
+        write_unordered(records, record_ops)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    client = MongoClient(settings.mongodb_uri)
+    database = client[settings.mongodb_db]
+    try:
+        counts = migrate(
+            database.get_collection("checklists"),
+            database.get_collection("checklist_contents"),
+            args.batch_size,
+            args.dry_run,
+        )
+    finally:
+        client.close()
+    print(
+        f"migrated {counts['migrated']} checklists into {counts['contents']} content documents, "
+        f"skipped {counts['skipped']} invalid trips"
+    )
+
+
+if __name__ == "__main__":
+    main()
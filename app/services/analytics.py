@@ -0,0 +1,277 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from app.config import get_settings
+from app.services.rule_catalog import RuleCatalog, current_catalog
+
+TRIP_FIELDS = ("origin_climate", "destination_climate", "season", "travel_type", "travel_mode")
+TRIP_INDEX_FIELDS = (*TRIP_FIELDS, "duration_days")
+
+EXPORT_PROJECTION = {"trip.traveler_demographics.name": 0, "trip.traveler_demographics.notes": 0}
+EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "checklist_id",
+    "rules_version",
+    *TRIP_FIELDS,
+    "duration_days",
+    "travelers",
+    "travel_start",
+)
+
+
+def trip_match(
+    origin_climate: Optional[str] = None,
+    destination_climate: Optional[str] = None,
+    season: Optional[str] = None,
+    travel_type: Optional[str] = None,
+    travel_mode: Optional[str] = None,
+    min_duration_days: Optional[int] = None,
+    max_duration_days: Optional[int] = None,
+    rules_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    match: Dict[str, Any] = {"trip": {"$exists": True}}
+    values = (origin_climate, destination_climate, season, travel_type, travel_mode)
+    for field, value in zip(TRIP_FIELDS, values):
+        if value is not None:
+            match[f"trip.{field}"] = value
+    duration: Dict[str, int] = {}
+    if min_duration_days is not None:
+        duration["$gte"] = min_duration_days
+    if max_duration_days is not None:
+        duration["$lte"] = max_duration_days
+    if duration:
+        match["trip.duration_days"] = duration
+    if rules_version is not None:
+        match["rules_version"] = rules_version
+    return match
+
+
+def dimension_expression(dimension: str, catalog: RuleCatalog) -> Any:
+    if dimension != "duration_bucket":
+        return f"$trip.{dimension}"
+    # Same result as trip_analyzer.duration_bucket: the last threshold reached wins.
+    branches = [
+        {"case": {"$gte": ["$trip.duration_days", threshold]}, "then": threshold}
+        for threshold in reversed(catalog.duration_thresholds)
+    ]
+    if not branches:
+        return 1
+    return {"$switch": {"branches": branches, "default": 1}}
+
+
+def _item_stages(contents: str, priority: Optional[str]) -> List[Dict[str, Any]]:
+    # Saving a trip stores its content in full, filling in response on a delta document from PATCH.
+    # Records written before that was the case can point at a delta document and are not counted.
+    stages: List[Dict[str, Any]] = [
+        {"$lookup": {"from": contents, "localField": "_id.checklist_id", "foreignField": "_id", "as": "content"}},
+        {"$unwind": "$content"},
+        {"$unwind": "$content.response.items"},
+    ]
+    if priority is not None:
+        stages.append({"$match": {"content.response.items.priority": priority}})
+    return stages
+
+
+def item_frequency_pipeline(
+    match: Dict[str, Any],
+    contents: str,
+    priority: Optional[str],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    return [
+        {"$match": match},
+        {"$group": {"_id": {"checklist_id": "$checklist_id"}, "trips": {"$sum": 1}}},
+        *_item_stages(contents, priority),
+        {
+            "$group": {
+                "_id": {"name": "$content.response.items.name", "priority": "$content.response.items.priority"},
+                "trips": {"$sum": "$trips"},
+            }
+        },
+        {"$sort": {"trips": -1, "_id.name": 1, "_id.priority": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "name": "$_id.name", "priority": "$_id.priority", "trips": 1}},
+    ]
+
+
+def top_items_pipeline(
+    match: Dict[str, Any],
+    contents: str,
+    expression: Any,
+    priority: Optional[str],
+    k: int,
+) -> List[Dict[str, Any]]:
+    return [
+        {"$match": match},
+        {"$group": {"_id": {"value": expression, "checklist_id": "$checklist_id"}, "trips": {"$sum": 1}}},
+        *_item_stages(contents, priority),
+        {
+            "$group": {
+                "_id": {"value": "$_id.value", "name": "$content.response.items.name"},
+                "trips": {"$sum": "$trips"},
+            }
+        },
+        {"$sort": {"_id.value": 1, "trips": -1, "_id.name": 1}},
+        {"$group": {"_id": "$_id.value", "items": {"$push": {"name": "$_id.name", "trips": "$trips"}}}},
+        {"$project": {"_id": 0, "value": "$_id", "items": {"$slice": ["$items", k]}}},
+    ]
+
+
+def shape_histogram_pipeline(match: Dict[str, Any], expressions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"$match": match},
+        {"$group": {"_id": expressions, "trips": {"$sum": 1}}},
+        {"$sort": {"trips": -1, "_id": 1}},
+        {"$project": {"_id": 0, "shape": "$_id", "trips": 1}},
+    ]
+
+
+async def _aggregate(collection: Any, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cursor = collection.aggregate(
+        pipeline,
+        allowDiskUse=True,
+        maxTimeMS=get_settings().analytics_max_time_ms,
+    )
+    return await cursor.to_list(None)
+
+
+def _share(trips: int, total: int) -> float:
+    return round(trips / total, 6) if total else 0.0
+
+
+async def item_frequencies(
+    records: Any,
+    contents: str,
+    match: Dict[str, Any],
+    priority: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    items, total = await asyncio.gather(
+        _aggregate(records, item_frequency_pipeline(match, contents, priority, limit)),
+        records.count_documents(match, maxTimeMS=get_settings().analytics_max_time_ms),
+    )
+    for item in items:
+        item["share"] = _share(item["trips"], total)
+    return {"trips": total, "items": items}
+
+
+async def shape_histogram(
+    records: Any,
+    match: Dict[str, Any],
+    dimensions: Sequence[str],
+    catalog: Optional[RuleCatalog] = None,
+) -> Dict[str, Any]:
+    catalog = catalog or current_catalog()
+    expressions = {dimension: dimension_expression(dimension, catalog) for dimension in dimensions}
+    shapes = await _aggregate(records, shape_histogram_pipeline(match, expressions))
+    total = sum(shape["trips"] for shape in shapes)
+    for shape in shapes:
+        shape["share"] = _share(shape["trips"], total)
+    return {"dimensions": list(dimensions), "trips": total, "shapes": shapes}
+
+
+async def top_items(
+    records: Any,
+    contents: str,
+    match: Dict[str, Any],
+    dimension: str,
+    priority: Optional[str] = None,
+    k: int = 10,
+    catalog: Optional[RuleCatalog] = None,
+) -> Dict[str, Any]:
+    catalog = catalog or current_catalog()
+    expression = dimension_expression(dimension, catalog)
+    groups, histogram = await asyncio.gather(
+        _aggregate(records, top_items_pipeline(match, contents, expression, priority, k)),
+        shape_histogram(records, match, [dimension], catalog),
+    )
+    totals = {shape["shape"].get(dimension): shape["trips"] for shape in histogram["shapes"]}
+    for group in groups:
+        group["trips"] = totals.get(group["value"], 0)
+        for item in group["items"]:
+            item["share"] = _share(item["trips"], group["trips"])
+    groups.sort(key=lambda group: (-group["trips"], str(group["value"])))
+    return {"dimension": dimension, "priority": priority, "groups": groups}
+
+
+def export_cursor(
+    records: Any,
+    match: Dict[str, Any],
+    after: Optional[ObjectId] = None,
+    limit: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Any:
+    query = dict(match)
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    cursor = records.find(query, EXPORT_PROJECTION, batch_size=batch_size or get_settings().export_batch_size)
+    cursor = cursor.sort("_id", ASCENDING)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def export_record(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": document["_id"],
+        "created_at": document.get("created_at"),
+        "checklist_id": document.get("checklist_id"),
+        "rules_version": document.get("rules_version"),
+        "trip": document.get("trip"),
+    }
+
+
+def export_row(document: Dict[str, Any]) -> List[Any]:
+    trip = document.get("trip") or {}
+    created_at = document.get("created_at")
+    return [
+        str(document["_id"]),
+        created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        document.get("checklist_id"),
+        document.get("rules_version"),
+        *(trip.get(field) for field in TRIP_FIELDS),
+        trip.get("duration_days"),
+        len(trip.get("traveler_demographics") or []),
+        _json_default(trip["travel_start"]) if trip.get("travel_start") else None,
+    ]
+
+
+async def iter_ndjson_export(cursor: Any, rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for document in cursor:
+        lines.append(json.dumps(export_record(document), separators=(",", ":"), default=_json_default))
+        if len(lines) >= rows_per_chunk:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def iter_csv_export(cursor: Any, rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    rows = 0
+    async for document in cursor:
+        writer.writerow(export_row(document))
+        rows += 1
+        if rows >= rows_per_chunk:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.schemas import ChecklistResponse, TripParameters
+from app.services.cache import LRUCache
+from app.services.checklist_repository import ChecklistRepository
+from app.services.rule_catalog import current_catalog
+from app.services.trip_analyzer import TripShape, build_checklist_response
+
+_STRUCTURAL = re.compile(rb'["\[\]{},]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_OPEN = frozenset(b"[{")
+_CLOSE = frozenset(b"]}")
+
+
+class MalformedBatchError(ValueError):
+    pass
+
+
+class JSONArraySplitter:
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._pos = 0
+        self._start = 0
+        self._depth = 0
+        self._in_string = False
+        self._started = False
+        self._has_elements = False
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        if self.finished:
+            if chunk.strip():
+                raise MalformedBatchError("Unexpected data after the JSON array")
+            return []
+        buffer = self._buffer
+        buffer += chunk
+        elements: List[bytes] = []
+        pos = self._pos
+        while not self.finished:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = buffer[match.start()]
+            pos = match.end()
+            if not self._started:
+                if token != ord("[") or buffer[: match.start()].strip():
+                    raise MalformedBatchError("Expected a JSON array of trips")
+                self._started = True
+                self._start = pos
+            elif token == ord('"'):
+                self._in_string = True
+            elif token in _OPEN:
+                self._depth += 1
+            elif token in _CLOSE and self._depth > 0:
+                self._depth -= 1
+            elif self._depth > 0:
+                continue
+            elif token == ord(",") or token == ord("]"):
+                element = bytes(buffer[self._start : match.start()]).strip()
+                if element:
+                    elements.append(element)
+                elif token == ord(",") or self._has_elements:
+                    raise MalformedBatchError("Empty element in JSON array")
+                self._has_elements = True
+                self._start = pos
+                self.finished = token == ord("]")
+            else:
+                raise MalformedBatchError("Unbalanced brackets in JSON array")
+        if self.finished and buffer[pos:].strip():
+            raise MalformedBatchError("Unexpected data after the JSON array")
+        consumed = self._start if self._started else 0
+        del buffer[:consumed]
+        self._pos = pos - consumed
+        self._start -= consumed
+        return elements
+
+    def close(self) -> None:
+        if not self.finished:
+            raise MalformedBatchError("Truncated JSON array")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    splitter = JSONArraySplitter()
+    async for chunk in chunks:
+        for element in splitter.feed(chunk):
+            yield element
+    splitter.close()
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    remainder = b""
+    async for chunk in chunks:
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def _error_line(index: Optional[int], detail: Any) -> bytes:
+    return json.dumps({"index": index, "detail": detail}, default=str).encode() + b"\n"
+
+
+async def generate_batch(
+    records: AsyncIterator[bytes],
+    repo: ChecklistRepository,
+    dedupe_size: int = 1024,
+    write_size: int = 500,
+) -> AsyncIterator[bytes]:
+    catalog = current_catalog()
+    rendered: LRUCache[Tuple[ChecklistResponse, bytes]] = LRUCache(dedupe_size)
+    pending: List[Tuple[TripParameters, ChecklistResponse]] = []
+    write: Optional["asyncio.Task[None]"] = None
+    index = 0
+    try:
+        async for raw in records:
+            try:
+                trip = TripParameters.parse_raw(raw)
+            except ValidationError as exc:
+                yield _error_line(index, exc.errors())
+                index += 1
+                continue
+            shape = TripShape.from_parameters(trip, catalog)
+            entry = rendered.get(shape)
+            if entry is None:
+                response = build_checklist_response(trip, catalog)
+                entry = (response, response.json().encode())
+                rendered.put(shape, entry)
+            yield b'{"index": %d, "checklist": %s}\n' % (index, entry[1])
+            index += 1
+            pending.append((trip, entry[0]))
+            if len(pending) >= write_size:
+                if write is not None:
+                    await write
+                write = asyncio.create_task(repo.save_checklists(pending, catalog))
+                pending = []
+    except MalformedBatchError as exc:
+        yield _error_line(None, str(exc))
+    if write is not None:
+        await write
+    if pending:
+        await repo.save_checklists(pending, catalog)
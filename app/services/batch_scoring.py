@@ -0,0 +1,219 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, get_args
+
+import numpy as np
+
+from app.models.schemas import ChecklistItem, ClimateProfile, Season, TravelMode, TravelType
+from app.services.rule_catalog import DEMOGRAPHIC_FLAGS, Rule, RuleCatalog, current_catalog
+from app.services.trip_analyzer import TripShape
+
+CLIMATES: Tuple[str, ...] = get_args(ClimateProfile)
+SEASONS: Tuple[str, ...] = get_args(Season)
+TRAVEL_TYPES: Tuple[str, ...] = get_args(TravelType)
+TRAVEL_MODES: Tuple[str, ...] = get_args(TravelMode)
+PRIORITIES: Tuple[str, ...] = ("critical", "high", "medium", "nice-to-have")
+PRIORITY_THRESHOLDS: Tuple[float, ...] = (0.9, 0.75, 0.5)
+MINIMUM_ITEMS = 50
+MAXIMUM_ITEMS = 100
+
+
+class RankedBatch(NamedTuple):
+    items: np.ndarray
+    scores: np.ndarray
+    priorities: np.ndarray
+    counts: np.ndarray
+
+
+class _Slot(NamedTuple):
+    rule: Rule
+    climate: Optional[str] = None
+    travel_type: Optional[str] = None
+    travel_mode: Optional[str] = None
+    season: Optional[str] = None
+    min_bucket: int = 0
+    flag: Optional[str] = None
+
+
+def _catalog_slots(catalog: RuleCatalog) -> List[_Slot]:
+    slots = [_Slot(rule) for rule in catalog.core_documents]
+    for mode, rules in catalog.travel_mode.items():
+        slots.extend(_Slot(rule, travel_mode=mode) for rule in rules)
+    for travel_type, rules in catalog.travel_type.items():
+        slots.extend(_Slot(rule, travel_type=travel_type) for rule in rules)
+    for climate, rules in catalog.climate.items():
+        slots.extend(_Slot(rule, climate=climate) for rule in rules)
+    slots.extend(_Slot(rule, min_bucket=threshold) for threshold, rule in catalog.duration)
+    for flag in DEMOGRAPHIC_FLAGS:
+        slots.extend(_Slot(rule, flag=flag) for rule in catalog.demographic.get(flag, ()))
+    for climate, rules in catalog.cultural.items():
+        slots.extend(_Slot(rule, climate=climate) for rule in rules)
+    return slots
+
+
+def _mask(values: Tuple[str, ...], slots: List[_Slot], field: str) -> np.ndarray:
+    mask = np.ones((len(values), len(slots)), dtype=bool)
+    for column, slot in enumerate(slots):
+        required = getattr(slot, field)
+        if required is not None:
+            mask[:, column] = [value == required for value in values]
+    return mask
+
+
+class BatchScorer:
+    """Columnar version of TripAnalyzer that scores many trip shapes at once.
+
+    Rules are laid out in TripAnalyzer's evaluation order, so the first applicable
+    slot of an item gives both its category and its tie-break position. Output is
+    identical to ``TripAnalyzer.generate_checklist`` for every trip shape.
+    """
+
+    def __init__(self, catalog: Optional[RuleCatalog] = None) -> None:
+        catalog = catalog or current_catalog()
+        slots = _catalog_slots(catalog)
+        self.catalog = catalog
+        self.slots = slots
+        self.padding = catalog.padding
+
+        names: List[str] = []
+        item_index: Dict[str, int] = {}
+        slot_items = []
+        for slot in slots:
+            key = slot.rule.name.lower()
+            if key not in item_index:
+                item_index[key] = len(names)
+                names.append(key)
+            slot_items.append(item_index[key])
+        padding_keys = [rule.name.lower() for rule in catalog.padding]
+        if len(set(padding_keys)) != len(padding_keys) or item_index.keys() & set(padding_keys):
+            raise ValueError("BatchScorer requires padding items that are unique and absent from other rules")
+        self.item_names: Tuple[str, ...] = tuple(names) + tuple(padding_keys)
+        self.rule_count = len(slots)
+        self.item_count = len(names)
+
+        self.slot_items = np.array(slot_items, dtype=np.intp)
+        self.base_scores = np.array([slot.rule.score for slot in slots], dtype=np.float64)
+        self.padding_scores = np.array([rule.score for rule in catalog.padding], dtype=np.float64)
+        self.climate_mask = _mask(CLIMATES, slots, "climate")
+        self.travel_type_mask = _mask(TRAVEL_TYPES, slots, "travel_type")
+        self.travel_mode_mask = _mask(TRAVEL_MODES, slots, "travel_mode")
+        self.season_mask = _mask(SEASONS, slots, "season")
+        self.min_bucket = np.array([slot.min_bucket for slot in slots], dtype=np.int64)
+        self.flag_mask = np.ones((1 << len(DEMOGRAPHIC_FLAGS), len(slots)), dtype=bool)
+        for column, slot in enumerate(slots):
+            if slot.flag is not None:
+                bit = 1 << DEMOGRAPHIC_FLAGS.index(slot.flag)
+                self.flag_mask[:, column] = [bool(flags & bit) for flags in range(self.flag_mask.shape[0])]
+
+        order = np.argsort(self.slot_items, kind="stable")
+        self._slot_order = order
+        self._group_starts = np.flatnonzero(np.r_[True, np.diff(self.slot_items[order]) != 0])
+        self._merged_items = {
+            item for item in range(self.item_count) if np.count_nonzero(self.slot_items == item) > 1
+        }
+
+    def encode(self, shapes: Sequence[TripShape]) -> Dict[str, np.ndarray]:
+        flag_bits = {flag: 1 << position for position, flag in enumerate(DEMOGRAPHIC_FLAGS)}
+        return {
+            "origin": np.array([CLIMATES.index(shape.origin_climate) for shape in shapes], dtype=np.intp),
+            "destination": np.array([CLIMATES.index(shape.destination_climate) for shape in shapes], dtype=np.intp),
+            "season": np.array([SEASONS.index(shape.season) for shape in shapes], dtype=np.intp),
+            "travel_type": np.array([TRAVEL_TYPES.index(shape.travel_type) for shape in shapes], dtype=np.intp),
+            "travel_mode": np.array([TRAVEL_MODES.index(shape.travel_mode) for shape in shapes], dtype=np.intp),
+            "bucket": np.array([shape.duration_bucket for shape in shapes], dtype=np.int64),
+            "flags": np.array(
+                [sum(flag_bits[flag] for flag in shape.demographic_flags) for shape in shapes], dtype=np.intp
+            ),
+        }
+
+    def applicability(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        return (
+            self.climate_mask[encoded["destination"]]
+            & self.travel_type_mask[encoded["travel_type"]]
+            & self.travel_mode_mask[encoded["travel_mode"]]
+            & self.season_mask[encoded["season"]]
+            & self.flag_mask[encoded["flags"]]
+            & (encoded["bucket"][:, None] >= self.min_bucket[None, :])
+        )
+
+    @staticmethod
+    def bonuses(encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        bonus = np.zeros(len(encoded["bucket"]), dtype=np.float64)
+        bonus = np.where(encoded["origin"] == encoded["destination"], bonus - 0.1, bonus)
+        bonus = np.where(encoded["bucket"] >= 10, bonus + 0.2, bonus)
+        bonus = np.where(encoded["bucket"] >= 21, bonus + 0.4, bonus)
+        return bonus
+
+    def rank(self, shapes: Sequence[TripShape], top_k: Optional[int] = None) -> RankedBatch:
+        encoded = self.encode(shapes)
+        applicable = self.applicability(encoded)
+        bonus = self.bonuses(encoded)
+        trips = len(shapes)
+
+        slot_scores = np.where(applicable, self.base_scores[None, :] + bonus[:, None], -np.inf)
+        positions = np.where(applicable, np.arange(self.rule_count)[None, :], np.iinfo(np.int64).max)
+        ordered_scores = slot_scores[:, self._slot_order]
+        ordered_positions = positions[:, self._slot_order]
+        item_scores = np.maximum.reduceat(ordered_scores, self._group_starts, axis=1)
+        item_positions = np.minimum.reduceat(ordered_positions, self._group_starts, axis=1)
+        present = np.isfinite(item_scores)
+        counts = present.sum(axis=1)
+
+        padding_added = np.clip(MAXIMUM_ITEMS - counts, 0, len(self.padding))
+        padding_present = np.arange(len(self.padding))[None, :] < padding_added[:, None]
+        padding_scores = np.where(padding_present, self.padding_scores[None, :] + bonus[:, None], -np.inf)
+        padding_positions = np.broadcast_to(
+            self.rule_count + np.arange(len(self.padding), dtype=np.int64), (trips, len(self.padding))
+        )
+
+        scores = np.concatenate([item_scores, padding_scores], axis=1)
+        tie_break = np.concatenate([item_positions, padding_positions], axis=1)
+        ranking = np.lexsort((tie_break, -scores), axis=-1)
+        totals = counts + padding_added
+        width = int(totals.max(initial=0))
+        if top_k is not None:
+            width = min(width, top_k)
+        ranking = ranking[:, :width]
+        ranked_scores = np.take_along_axis(scores, ranking, axis=1)
+        valid = np.arange(width)[None, :] < totals[:, None]
+        priorities = np.full(ranked_scores.shape, len(PRIORITIES) - 1, dtype=np.int8)
+        for code, threshold in reversed(list(enumerate(PRIORITY_THRESHOLDS))):
+            priorities = np.where(ranked_scores >= threshold, code, priorities).astype(np.int8)
+        return RankedBatch(
+            items=np.where(valid, ranking, -1),
+            scores=np.where(valid, ranked_scores, np.nan),
+            priorities=np.where(valid, priorities, -1).astype(np.int8),
+            counts=np.minimum(totals, width),
+        )
+
+    def checklists(self, shapes: Sequence[TripShape], top_k: Optional[int] = None) -> List[List[ChecklistItem]]:
+        ranked = self.rank(shapes, top_k)
+        applicable = self.applicability(self.encode(shapes)) if self._merged_items else None
+        results: List[List[ChecklistItem]] = []
+        for row in range(len(shapes)):
+            checklist: List[ChecklistItem] = []
+            for column in range(int(ranked.counts[row])):
+                item = int(ranked.items[row, column])
+                category, rationale = self._describe(item, applicable[row] if applicable is not None else None)
+                checklist.append(
+                    ChecklistItem(
+                        name=self.item_names[item].title(),
+                        category=category,
+                        score=round(float(ranked.scores[row, column]), 2),
+                        rationale=rationale,
+                        priority=PRIORITIES[ranked.priorities[row, column]],
+                    )
+                )
+            results.append(checklist)
+        return results
+
+    def _describe(self, item: int, applicable: Optional[np.ndarray]) -> Tuple[str, List[str]]:
+        if item >= self.item_count:
+            rule = self.padding[item - self.item_count]
+            return rule.category, list(rule.rationale)
+        columns = np.flatnonzero(self.slot_items == item)
+        if item in self._merged_items and applicable is not None:
+            columns = columns[applicable[columns]]
+        first = self.slots[int(columns[0])].rule
+        notes = list(first.rationale)
+        for column in columns[1:]:
+            notes = list(dict.fromkeys([*notes, *self.slots[int(column)].rule.rationale]))
+        return first.category, notes
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if self.ttl is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight(Generic[V]):
+    """Runs one call per key at a time and shares its result with concurrent callers.
+
+    The call runs in its own task and every caller awaits it through ``asyncio.shield``,
+    so a cancelled caller, including the one that started it, does not cancel the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[V]"] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[V]]) -> V:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(call)
+
+    def _finish(self, key: Hashable, call: "asyncio.Future[V]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Retrieve the exception so it is not reported as unhandled when every caller has gone.
+            call.exception()
+
+
+class ReadThroughCache(Generic[V]):
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self._cache: LRUCache[V] = LRUCache(maxsize, ttl)
+        self._flights: SingleFlight[Optional[V]] = SingleFlight()
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+        value = await self._flights.do(key, loader)
+        if value is not None:
+            self._cache.put(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Sequence
+
+from app.models.schemas import ChecklistDiff, ChecklistItem, PriorityChange, ScoreChange
+from app.services.trip_analyzer import TripShape
+
+
+def diff_checklists(previous: Sequence[ChecklistItem], current: Sequence[ChecklistItem]) -> ChecklistDiff:
+    before = {item.name: item for item in previous}
+    diff = ChecklistDiff()
+    for item in current:
+        old = before.pop(item.name, None)
+        if old is None:
+            diff.added.append(item)
+            continue
+        if old.score != item.score:
+            diff.rescored.append(ScoreChange(name=item.name, previous_score=old.score, score=item.score))
+        if old.priority != item.priority:
+            diff.reprioritized.append(
+                PriorityChange(name=item.name, previous_priority=old.priority, priority=item.priority)
+            )
+    diff.removed.extend(before)
+    return diff
+
+
+def checklist_delta(previous: Sequence[ChecklistItem], current: Sequence[ChecklistItem]) -> Dict[str, Any]:
+    before = {item.name: item for item in previous}
+    names = {item.name for item in current}
+    return {
+        "removed": [name for name in before if name not in names],
+        "changed": [item.dict() for item in current if before.get(item.name) != item],
+        "order": [item.name for item in current],
+    }
+
+
+def apply_checklist_delta(
+    base_response: Dict[str, Any],
+    delta: Dict[str, Any],
+    shape: TripShape,
+) -> Dict[str, Any]:
+    items = {item["name"]: item for item in base_response["items"]}
+    for name in delta["removed"]:
+        items.pop(name, None)
+    for item in delta["changed"]:
+        items[item["name"]] = item
+    ordered: List[Dict[str, Any]] = [items[name] for name in delta["order"]]
+    return {
+        "destination": shape.destination_climate,
+        "trip_type": shape.travel_type,
+        "travel_mode": shape.travel_mode,
+        "climate": shape.destination_climate,
+        "items": ordered,
+    }
@@ -0,0 +1,69 @@
+from typing import Any, Dict, Iterable, Optional
+
+from app.api.responses import render_json_fast
+from app.config import get_settings
+from app.services.cache import LRUCache
+from app.services.metrics import span
+from app.services.response_shaping import ShapingOptions, category_summary, project_item, shape_document
+from app.services.rule_catalog import RuleCatalog, current_catalog, on_catalog_change
+from app.services.trip_analyzer import ChecklistEntry, TripAnalyzer, TripShape
+
+_rendered: LRUCache[bytes] = LRUCache(get_settings().checklist_cache_size)
+_shaped: LRUCache[bytes] = LRUCache(get_settings().checklist_cache_size)
+
+
+def clear_rendered_checklists(*_: RuleCatalog) -> None:
+    _rendered.clear()
+    _shaped.clear()
+
+
+on_catalog_change(clear_rendered_checklists)
+
+
+def checklist_document(shape: TripShape, entries: Iterable[ChecklistEntry]) -> Dict[str, Any]:
+    return {
+        "destination": shape.destination_climate,
+        "trip_type": shape.travel_type,
+        "travel_mode": shape.travel_mode,
+        "climate": shape.destination_climate,
+        "items": [dict(zip(ChecklistEntry._fields, entry)) for entry in entries],
+    }
+
+
+def render_checklist(shape: TripShape, catalog: Optional[RuleCatalog] = None) -> bytes:
+    """Render a /generate body from plain tuples, without pydantic models.
+
+    Produces the same bytes as FastAPI serializing ``ChecklistResponse``.
+    """
+    catalog = catalog or current_catalog()
+    cache_key = (catalog.version, shape)
+    body = _rendered.get(cache_key)
+    if body is None:
+        with span("rules"):
+            entries = TripAnalyzer(catalog=catalog, shape=shape).generate_entries()
+        with span("render"):
+            body = render_json_fast(checklist_document(shape, entries))
+        _rendered.put(cache_key, body)
+    return body
+
+
+def render_shaped_checklist(shape: TripShape, options: ShapingOptions, catalog: Optional[RuleCatalog] = None) -> bytes:
+    """Render a /generate body filtered, truncated and projected as ``options`` ask.
+
+    Filtering happens before ranking and ``limit`` selects the top items with a
+    partial sort, so the full checklist is never ranked.
+    """
+    catalog = catalog or current_catalog()
+    cache_key = (catalog.version, shape, options)
+    body = _shaped.get(cache_key)
+    if body is None:
+        with span("rules"):
+            analyzer = TripAnalyzer(catalog=catalog, shape=shape)
+            entries = analyzer.generate_entries(options.limit, options.categories, options.min_priority)
+        with span("render"):
+            document = checklist_document(shape, entries)
+            items = [project_item(item, options.fields) for item in document["items"]]
+            category_counts = category_summary(analyzer.category_counts)
+            body = render_json_fast(shape_document(document, items, category_counts, options))
+        _shaped.put(cache_key, body)
+    return body
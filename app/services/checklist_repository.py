@@ -1,16 +1,290 @@
-from typing import Any, Dict
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.config import get_settings
 from app.db import database
-from app.models.schemas import ChecklistResponse, TripParameters
+from app.models.schemas import ChecklistResponse, ItineraryParameters, ItineraryResponse, TripParameters
+from app.services.analytics import TRIP_INDEX_FIELDS
+from app.services.cache import LRUCache
+from app.services.checklist_diff import apply_checklist_delta
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.rule_catalog import RuleCatalog, current_catalog
+from app.services.spool import PersistenceSpool, content_entry, content_update, record_entry
+from app.services.trip_analyzer import ItineraryShape, TripShape, checklist_id
+from app.services.write_behind import WriteBehindQueue, ignore_duplicate_keys
+
+MAX_DELTA_DEPTH = 8
+
+UNAVAILABLE_ERRORS = (CircuitOpenError, asyncio.TimeoutError, PyMongoError)
+
+_stored_contents: LRUCache[bool] = LRUCache(get_settings().checklist_cache_size)
+
+
+def content_document(
+    shape: Union[TripShape, ItineraryShape],
+    response_document: Dict[str, Any],
+    created_at: datetime,
+    rules_version: str,
+) -> Dict[str, Any]:
+    return {
+        "shape": shape.to_document(),
+        "rules_version": rules_version,
+        "response": response_document,
+        "created_at": created_at,
+    }
+
+
+def delta_document(
+    shape: TripShape,
+    base_id: str,
+    delta: Dict[str, Any],
+    depth: int,
+    created_at: datetime,
+    rules_version: str,
+) -> Dict[str, Any]:
+    return {
+        "shape": shape.to_document(),
+        "rules_version": rules_version,
+        "base": base_id,
+        "delta": delta,
+        "depth": depth,
+        "created_at": created_at,
+    }
+
+
+def request_document(
+    params: TripParameters,
+    content_id: str,
+    created_at: datetime,
+    rules_version: str,
+) -> Dict[str, Any]:
+    return {
+        "checklist_id": content_id,
+        "rules_version": rules_version,
+        "created_at": created_at,
+        "trip": params.dict(),
+    }
+
+
+def itinerary_document(
+    params: ItineraryParameters,
+    content_id: str,
+    created_at: datetime,
+    rules_version: str,
+) -> Dict[str, Any]:
+    return {
+        "checklist_id": content_id,
+        "rules_version": rules_version,
+        "created_at": created_at,
+        "itinerary": params.dict(),
+    }
+
+
+def revision_document(
+    base_id: str,
+    content_id: str,
+    changes: Dict[str, Any],
+    diff: Dict[str, Any],
+    created_at: datetime,
+    rules_version: str,
+) -> Dict[str, Any]:
+    return {
+        "checklist_id": content_id,
+        "base_checklist_id": base_id,
+        "rules_version": rules_version,
+        "created_at": created_at,
+        "changes": changes,
+        "diff": diff,
+    }
+
+
+ChecklistContent = Union[ChecklistResponse, bytes, memoryview, Callable[[], bytes]]
+
+
+def response_document(response: ChecklistContent) -> Dict[str, Any]:
+    if callable(response):
+        response = response()
+    if isinstance(response, (bytes, memoryview)):
+        return json.loads(bytes(response))
+    return response.dict()
+
+
+class PersistenceUnavailableError(RuntimeError):
+    pass
 
 
 class ChecklistRepository:
-    def __init__(self) -> None:
-        self.collection = database.get_collection("checklists")
-
-    async def save_checklist(self, params: TripParameters, response: ChecklistResponse) -> None:
-        payload: Dict[str, Any] = {
-            "trip": params.dict(),
-            "response": response.dict(),
-        }
-        await self.collection.insert_one(payload)
+    def __init__(
+        self,
+        collection: Any = None,
+        writer: Optional[WriteBehindQueue] = None,
+        contents: Any = None,
+        breaker: Optional[CircuitBreaker] = None,
+        spool: Optional[PersistenceSpool] = None,
+    ) -> None:
+        self.collection = collection if collection is not None else database.get_collection("checklists")
+        self.contents = contents if contents is not None else database.get_collection("checklist_contents")
+        self.writer = writer
+        self.breaker = breaker
+        self.spool = spool
+
+    async def _call(self, operation: Callable[[], Awaitable[Any]]) -> Any:
+        if self.breaker is None:
+            return await operation()
+        return await self.breaker.call(operation)
+
+    async def _write(
+        self,
+        operation: Callable[[], Awaitable[Any]],
+        deferred: Callable[[], List[Dict[str, Any]]],
+    ) -> bool:
+        if self.spool is None:
+            await self._call(operation)
+            return True
+        try:
+            await self._call(operation)
+        except UNAVAILABLE_ERRORS:
+            await self.spool.append(deferred())
+            return False
+        return True
+
+    async def _upsert_content(self, content_id: str, document: Dict[str, Any]) -> None:
+        try:
+            await self.contents.update_one({"_id": content_id}, content_update(document), upsert=True)
+        except DuplicateKeyError:
+            pass
+
+    async def _save_content(self, content_id: str, document: Dict[str, Any]) -> None:
+        saved = await self._write(
+            lambda: self._upsert_content(content_id, document),
+            lambda: [content_entry(content_id, document)],
+        )
+        if saved:
+            _stored_contents.put(content_id, "response" in document)
+
+    async def _save_record(self, payload: Dict[str, Any]) -> None:
+        if self.writer is not None:
+            await self.writer.enqueue(payload)
+        else:
+            await self._write(lambda: self.collection.insert_one(payload), lambda: [record_entry(payload)])
+
+    async def save_checklist(
+        self,
+        params: TripParameters,
+        response: ChecklistContent,
+        catalog: Optional[RuleCatalog] = None,
+    ) -> str:
+        catalog = catalog or current_catalog()
+        created_at = datetime.now(timezone.utc)
+        shape = TripShape.from_parameters(params, catalog)
+        content_id = checklist_id(shape, catalog.version)
+        if not _stored_contents.get(content_id):
+            document = content_document(shape, response_document(response), created_at, catalog.version)
+            await self._save_content(content_id, document)
+        await self._save_record(request_document(params, content_id, created_at, catalog.version))
+        return content_id
+
+    async def save_checklists(
+        self,
+        entries: Iterable[Tuple[TripParameters, ChecklistResponse]],
+        catalog: Optional[RuleCatalog] = None,
+    ) -> List[str]:
+        catalog = catalog or current_catalog()
+        created_at = datetime.now(timezone.utc)
+        documents: Dict[str, Dict[str, Any]] = {}
+        payloads: List[Dict[str, Any]] = []
+        for params, response in entries:
+            shape = TripShape.from_parameters(params, catalog)
+            content_id = checklist_id(shape, catalog.version)
+            if content_id not in documents and not _stored_contents.get(content_id):
+                documents[content_id] = content_document(shape, response.dict(), created_at, catalog.version)
+            payloads.append(request_document(params, content_id, created_at, catalog.version))
+        if documents:
+            operations = [
+                UpdateOne({"_id": content_id}, content_update(document), upsert=True)
+                for content_id, document in documents.items()
+            ]
+            saved = await self._write(
+                lambda: ignore_duplicate_keys(self.contents.bulk_write(operations, ordered=False)),
+                lambda: [content_entry(content_id, document) for content_id, document in documents.items()],
+            )
+            if saved:
+                for content_id in documents:
+                    _stored_contents.put(content_id, True)
+        if not payloads:
+            return []
+        if self.writer is not None:
+            for payload in payloads:
+                await self.writer.enqueue(payload)
+        else:
+            await self._write(
+                lambda: self.collection.insert_many(payloads, ordered=False),
+                lambda: [record_entry(payload) for payload in payloads],
+            )
+        return [payload["checklist_id"] for payload in payloads]
+
+    async def save_itinerary(
+        self,
+        params: ItineraryParameters,
+        response: ItineraryResponse,
+        catalog: Optional[RuleCatalog] = None,
+    ) -> str:
+        catalog = catalog or current_catalog()
+        created_at = datetime.now(timezone.utc)
+        shape = ItineraryShape.from_parameters(params, catalog)
+        content_id = checklist_id(shape, catalog.version)
+        if not _stored_contents.get(content_id):
+            await self._save_content(content_id, content_document(shape, response.dict(), created_at, catalog.version))
+        await self._save_record(itinerary_document(params, content_id, created_at, catalog.version))
+        return content_id
+
+    async def save_revision(
+        self,
+        base: Dict[str, Any],
+        shape: TripShape,
+        response: ChecklistResponse,
+        delta: Dict[str, Any],
+        changes: Dict[str, Any],
+        diff: Dict[str, Any],
+        catalog: Optional[RuleCatalog] = None,
+    ) -> str:
+        catalog = catalog or current_catalog()
+        created_at = datetime.now(timezone.utc)
+        content_id = checklist_id(shape, catalog.version)
+        if content_id != base["_id"] and _stored_contents.get(content_id) is None:
+            depth = base.get("depth", 0) + 1
+            if depth > MAX_DELTA_DEPTH:
+                document = content_document(shape, response.dict(), created_at, catalog.version)
+            else:
+                document = delta_document(shape, base["_id"], delta, depth, created_at, catalog.version)
+            await self._save_content(content_id, document)
+        await self._save_record(revision_document(base["_id"], content_id, changes, diff, created_at, catalog.version))
+        return content_id
+
+    async def find_content(self, content_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            document = await self._call(lambda: self.contents.find_one({"_id": content_id}))
+        except UNAVAILABLE_ERRORS as exc:
+            if self.breaker is None:
+                raise
+            raise PersistenceUnavailableError("Checklist storage is unavailable") from exc
+        if document is None or "response" in document:
+            return document
+        base = await self.find_content(document["base"])
+        if base is None:
+            return None
+        shape = TripShape.from_document(document["shape"])
+        document["response"] = apply_checklist_delta(base["response"], document["delta"], shape)
+        return document
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index([("checklist_id", ASCENDING)])
+        await self.collection.create_index([("created_at", DESCENDING)])
+        for field in TRIP_INDEX_FIELDS:
+            await self.collection.create_index([(f"trip.{field}", ASCENDING)])
+        await self.contents.create_index([("rules_version", ASCENDING)])
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling MongoDB after repeated errors or slow calls.
+
+    ``error_threshold`` consecutive failures open the breaker. A call fails when it
+    raises, when it runs past ``call_timeout``, or when it succeeds but takes longer
+    than ``latency_threshold``. After ``reset_timeout`` seconds one trial call is let
+    through: its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        error_threshold: int = 5,
+        latency_threshold: float = 1.0,
+        call_timeout: Optional[float] = 2.0,
+        reset_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.call_timeout = call_timeout
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_running:
+            self._state = HALF_OPEN
+            self._trial_running = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, elapsed: float) -> None:
+        if elapsed > self.latency_threshold:
+            self.slow_calls += 1
+            self.record_failure()
+            return
+        self._trial_running = False
+        self.consecutive_failures = 0
+        if self._state != CLOSED:
+            logger.info("MongoDB circuit breaker closed")
+        self._state = CLOSED
+
+    def record_failure(self) -> None:
+        self._trial_running = False
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN or (
+            self._state == CLOSED and self.consecutive_failures >= self.error_threshold
+        ):
+            if self._state == CLOSED:
+                logger.warning("MongoDB circuit breaker opened after %d failed calls", self.consecutive_failures)
+            self._state = OPEN
+            self._opened_at = self._clock()
+            self.opened += 1
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        if not self.allow():
+            raise CircuitOpenError("MongoDB circuit breaker is open")
+        started = time.perf_counter()
+        try:
+            if self.call_timeout is None:
+                result = await operation()
+            else:
+                result = await asyncio.wait_for(operation(), self.call_timeout)
+        except asyncio.CancelledError:
+            self._trial_running = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
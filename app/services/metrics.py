@@ -0,0 +1,324 @@
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+from app.config import get_settings
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_settings = get_settings()
+enabled: bool = _settings.metrics_enabled
+server_timing: bool = _settings.server_timing
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in snapshot:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                bucket_labels = _format_labels(self.label_names, labels, le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    "travelready_http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = registry.histogram(
+    "travelready_stage_duration_seconds", "Time spent in each request-handling stage.", ("stage",)
+)
+MONGO_COMMAND_SECONDS = registry.histogram(
+    "travelready_mongo_command_duration_seconds", "MongoDB command round-trip time.", ("command", "outcome")
+)
+MONGO_POOL_CONNECTIONS = registry.gauge(
+    "travelready_mongo_pool_connections", "Open connections in the MongoDB connection pool.", ("address",)
+)
+MONGO_POOL_CHECKED_OUT = registry.gauge(
+    "travelready_mongo_pool_checked_out", "Connections currently checked out of the pool.", ("address",)
+)
+MONGO_POOL_WAIT_SECONDS = registry.histogram(
+    "travelready_mongo_pool_wait_duration_seconds", "Time spent waiting to check out a connection.", ("address",)
+)
+MONGO_POOL_CHECKOUT_FAILURES = registry.counter(
+    "travelready_mongo_pool_checkout_failures_total", "Failed connection check-outs.", ("address", "reason")
+)
+MONGO_POOL_CLEARED = registry.counter(
+    "travelready_mongo_pool_cleared_total", "Times the connection pool was cleared.", ("address",)
+)
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> "_Span":
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        record_stage(self.stage, perf_counter() - self.started)
+
+
+_NO_SPAN = nullcontext()
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def active() -> bool:
+    return enabled or server_timing
+
+
+def span(stage: str) -> ContextManager[Any]:
+    if not (enabled or server_timing):
+        return _NO_SPAN
+    return _Span(stage)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    if enabled:
+        STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def start_request_timings() -> Tuple[List[Tuple[str, float]], Any]:
+    timings: List[Tuple[str, float]] = []
+    return timings, _request_timings.set(timings)
+
+
+def finish_request_timings(token: Any) -> None:
+    _request_timings.reset(token)
+
+
+def format_server_timing(timings: Sequence[Tuple[str, float]]) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings)
+
+
+def _address(address: Tuple[str, Optional[int]]) -> str:
+    host, port = address
+    return f"{host}:{port}" if port is not None else host
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1_000_000, event.command_name, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1_000_000, event.command_name, "failure")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self) -> None:
+        self._checkout_started = threading.local()
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.set(0, _address(event.address))
+        MONGO_POOL_CHECKED_OUT.set(0, _address(event.address))
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        MONGO_POOL_CLEARED.inc(_address(event.address))
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.set(0, _address(event.address))
+        MONGO_POOL_CHECKED_OUT.set(0, _address(event.address))
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.inc(_address(event.address))
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        MONGO_POOL_CONNECTIONS.dec(_address(event.address))
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self._checkout_started.value = perf_counter()
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        MONGO_POOL_CHECKOUT_FAILURES.inc(_address(event.address), str(event.reason))
+        self._observe_wait(event.address)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        MONGO_POOL_CHECKED_OUT.inc(_address(event.address))
+        self._observe_wait(event.address)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        MONGO_POOL_CHECKED_OUT.dec(_address(event.address))
+
+    def _observe_wait(self, address: Tuple[str, Optional[int]]) -> None:
+        started = getattr(self._checkout_started, "value", None)
+        if started is not None:
+            MONGO_POOL_WAIT_SECONDS.observe(perf_counter() - started, _address(address))
+            self._checkout_started.value = None
+
+
+def mongo_listeners() -> List[Any]:
+    if not enabled:
+        return []
+    return [CommandMetrics(), PoolMetrics()]
@@ -0,0 +1,97 @@
+import hashlib
+import heapq
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from app.models.schemas import ChecklistItem
+
+ITEM_FIELDS: Tuple[str, ...] = tuple(ChecklistItem.__fields__)
+PRIORITY_RANKS = {"nice-to-have": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+class ShapingOptions(NamedTuple):
+    limit: Optional[int] = None
+    categories: FrozenSet[str] = frozenset()
+    min_priority: Optional[str] = None
+    fields: Optional[Tuple[str, ...]] = None
+    summary: bool = False
+
+    @property
+    def active(self) -> bool:
+        return self != NO_SHAPING
+
+    def etag_suffix(self) -> str:
+        canonical = repr((self.limit, sorted(self.categories), self.min_priority, self.fields, self.summary))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+
+NO_SHAPING = ShapingOptions()
+
+
+def split_values(values: Iterable[str]) -> List[str]:
+    return [part.strip() for value in values for part in value.split(",") if part.strip()]
+
+
+def shaping_options(
+    limit: Optional[int] = None,
+    categories: Iterable[str] = (),
+    min_priority: Optional[str] = None,
+    fields: Iterable[str] = (),
+    summary: bool = False,
+) -> ShapingOptions:
+    requested = set(split_values(fields))
+    unknown = requested - set(ITEM_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown item fields: {', '.join(sorted(unknown))}")
+    return ShapingOptions(
+        limit=limit,
+        categories=frozenset(split_values(categories)),
+        min_priority=None if min_priority == "nice-to-have" else min_priority,
+        fields=tuple(field for field in ITEM_FIELDS if field in requested) if requested else None,
+        summary=summary,
+    )
+
+
+def category_summary(counts: Mapping[str, int]) -> Dict[str, int]:
+    return dict(sorted(counts.items()))
+
+
+def project_item(item: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields}
+
+
+def select_items(items: List[Dict[str, Any]], options: ShapingOptions) -> List[Dict[str, Any]]:
+    """Filter and truncate items that are already ranked by descending score."""
+    selected: Iterable[Dict[str, Any]] = items
+    if options.categories or options.min_priority:
+        minimum = PRIORITY_RANKS[options.min_priority or "nice-to-have"]
+        selected = [
+            item
+            for item in items
+            if (not options.categories or item["category"] in options.categories)
+            and PRIORITY_RANKS[item["priority"]] >= minimum
+        ]
+    if options.limit is not None:
+        selected = heapq.nlargest(options.limit, selected, key=lambda item: item["score"])
+    return [project_item(item, options.fields) for item in selected]
+
+
+def shape_document(
+    document: Dict[str, Any],
+    items: List[Dict[str, Any]],
+    category_counts: Dict[str, int],
+    options: ShapingOptions,
+) -> Dict[str, Any]:
+    shaped = {key: value for key, value in document.items() if key != "items"}
+    shaped["items"] = items
+    if options.summary:
+        shaped["category_counts"] = category_counts
+    return shaped
+
+
+def shape_response(document: Dict[str, Any], options: ShapingOptions) -> Dict[str, Any]:
+    items = document["items"]
+    category_counts = category_summary(Counter(item["category"] for item in items)) if options.summary else {}
+    return shape_document(document, select_items(items, options), category_counts, options)
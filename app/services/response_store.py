@@ -0,0 +1,191 @@
+import itertools
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import render_json
+from app.models.schemas import ClimateProfile, Season, TravelMode, TravelType
+from app.services.rule_catalog import DEMOGRAPHIC_FLAGS, RuleCatalog, current_catalog
+from app.services.trip_analyzer import TripAnalyzer, TripShape, build_shape_response
+
+MAGIC = b"TRRS"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sHHI")
+BLOB_ID = struct.Struct("<I")
+BLOB_ENTRY = struct.Struct("<QI")
+
+
+class ResponseStoreError(ValueError):
+    pass
+
+
+def shape_dimensions(catalog: RuleCatalog) -> Dict[str, List[Any]]:
+    return {
+        "origin_climate": list(get_args(ClimateProfile)),
+        "destination_climate": list(get_args(ClimateProfile)),
+        "season": list(get_args(Season)),
+        "travel_type": list(get_args(TravelType)),
+        "travel_mode": list(get_args(TravelMode)),
+        "duration_bucket": sorted({1, *catalog.duration_thresholds}),
+    }
+
+
+def _output_key(shape: TripShape) -> Tuple[Any, ...]:
+    return (
+        shape.origin_climate == shape.destination_climate,
+        shape.destination_climate,
+        shape.travel_type,
+        shape.travel_mode,
+        shape.duration_bucket,
+        shape.demographic_flags,
+    )
+
+
+def render_shape(shape: TripShape, catalog: RuleCatalog) -> bytes:
+    items = TripAnalyzer(catalog=catalog, shape=shape).generate_checklist()
+    return render_json(jsonable_encoder(build_shape_response(shape, items)))
+
+
+def build_response_store(
+    path: Union[str, Path],
+    catalog: Optional[RuleCatalog] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """Render every trip shape's /generate body and write them to an indexed file.
+
+    Rules depend only on whether origin and destination climates match, not on the
+    origin itself or the season, so each distinct output is rendered once.
+    """
+    catalog = catalog or current_catalog()
+    dimensions = shape_dimensions(catalog)
+    flag_combinations = 1 << len(DEMOGRAPHIC_FLAGS)
+    rendered: Dict[Tuple[Any, ...], int] = {}
+    blob_ids: Dict[bytes, int] = {}
+    blobs: List[bytes] = []
+    index: List[int] = []
+    total = flag_combinations
+    for values in dimensions.values():
+        total *= len(values)
+    for combination in itertools.product(*dimensions.values(), range(flag_combinations)):
+        *fields, flag_bits = combination
+        shape = TripShape(
+            *fields,
+            demographic_flags=frozenset(
+                flag for position, flag in enumerate(DEMOGRAPHIC_FLAGS) if flag_bits & (1 << position)
+            ),
+        )
+        key = _output_key(shape)
+        blob_id = rendered.get(key)
+        if blob_id is None:
+            body = render_shape(shape, catalog)
+            blob_id = blob_ids.setdefault(body, len(blobs))
+            if blob_id == len(blobs):
+                blobs.append(body)
+            rendered[key] = blob_id
+        index.append(blob_id)
+        if progress is not None and len(index) % 1000 == 0:
+            progress(len(index), total)
+
+    header = render_json(
+        {
+            "rules_version": catalog.version,
+            "dimensions": dimensions,
+            "demographic_flags": list(DEMOGRAPHIC_FLAGS),
+            "shapes": len(index),
+            "blobs": len(blobs),
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+    )
+    data_offset = PREAMBLE.size + len(header) + BLOB_ID.size * len(index) + BLOB_ENTRY.size * len(blobs)
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    with temporary.open("wb") as handle:
+        handle.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+        handle.write(header)
+        handle.write(b"".join(BLOB_ID.pack(blob_id) for blob_id in index))
+        offset = data_offset
+        for body in blobs:
+            handle.write(BLOB_ENTRY.pack(offset, len(body)))
+            offset += len(body)
+        for body in blobs:
+            handle.write(body)
+    os.replace(temporary, path)
+    return {"shapes": len(index), "blobs": len(blobs), "bytes": offset}
+
+
+class ResponseStore:
+    """Read-only, memory-mapped view of a file written by ``build_response_store``."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        try:
+            with self.path.open("rb") as handle:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise ResponseStoreError(f"Cannot open response store {self.path}: {exc}") from exc
+        try:
+            header, header_length = self._read_header()
+        except (KeyError, TypeError, ValueError, struct.error) as exc:
+            self._map.close()
+            raise ResponseStoreError(f"Invalid response store {self.path}: {exc}") from exc
+        self.rules_version: str = header["rules_version"]
+        self.shapes: int = header["shapes"]
+        self.blobs: int = header["blobs"]
+        self._dimensions = [
+            (field, {value: position for position, value in enumerate(values)})
+            for field, values in header["dimensions"].items()
+        ]
+        self._flag_bits = {flag: 1 << position for position, flag in enumerate(header["demographic_flags"])}
+        self._index_offset = PREAMBLE.size + header_length
+        self._table_offset = self._index_offset + BLOB_ID.size * self.shapes
+        self._view = memoryview(self._map)
+
+    def _read_header(self) -> Tuple[Dict[str, Any], int]:
+        magic, version, _, header_length = PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} response store")
+        header = json.loads(self._map[PREAMBLE.size : PREAMBLE.size + header_length])
+        table_end = PREAMBLE.size + header_length + BLOB_ID.size * header["shapes"] + BLOB_ENTRY.size * header["blobs"]
+        if len(self._map) < table_end:
+            raise ValueError("file is truncated")
+        return header, header_length
+
+    def __len__(self) -> int:
+        return self.shapes
+
+    def _position(self, shape: TripShape) -> Optional[int]:
+        position = 0
+        for field, values in self._dimensions:
+            offset = values.get(getattr(shape, field))
+            if offset is None:
+                return None
+            position = position * len(values) + offset
+        flags = 0
+        for flag in shape.demographic_flags:
+            bit = self._flag_bits.get(flag)
+            if bit is None:
+                return None
+            flags |= bit
+        return (position << len(self._flag_bits)) | flags
+
+    def get(self, shape: TripShape) -> Optional[memoryview]:
+        position = self._position(shape)
+        if position is None:
+            return None
+        (blob_id,) = BLOB_ID.unpack_from(self._map, self._index_offset + BLOB_ID.size * position)
+        offset, length = BLOB_ENTRY.unpack_from(self._map, self._table_offset + BLOB_ENTRY.size * blob_id)
+        return self._view[offset : offset + length]
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            pass
+
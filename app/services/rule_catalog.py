@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple, Union, get_args
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.config import get_settings
+from app.models.schemas import ClimateProfile, DemographicFlag, TravelMode, TravelType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / "rules" / "catalog.json"
+DEMOGRAPHIC_FLAGS: Tuple[str, ...] = ("senior", "special_needs", "child")
+BONUS_THRESHOLDS: FrozenSet[int] = frozenset({10, 21})
+
+
+class Rule(NamedTuple):
+    name: str
+    category: str
+    score: float
+    rationale: Tuple[str, ...]
+
+
+class RuleCatalog(NamedTuple):
+    version: str
+    core_documents: Tuple[Rule, ...]
+    travel_mode: Mapping[str, Tuple[Rule, ...]]
+    travel_type: Mapping[str, Tuple[Rule, ...]]
+    climate: Mapping[str, Tuple[Rule, ...]]
+    duration: Tuple[Tuple[int, Rule], ...]
+    demographic: Mapping[str, Tuple[Rule, ...]]
+    cultural: Mapping[str, Tuple[Rule, ...]]
+    padding: Tuple[Rule, ...]
+    duration_thresholds: Tuple[int, ...]
+
+
+class RuleSpec(BaseModel):
+    name: str = Field(..., min_length=1)
+    category: str = Field(..., min_length=1)
+    score: float = Field(..., ge=0)
+    rationale: List[str] = Field(default_factory=list)
+
+    class Config:
+        extra = "forbid"
+
+    def compile(self) -> Rule:
+        return Rule(self.name, self.category, self.score, tuple(self.rationale))
+
+
+class DurationRuleSpec(RuleSpec):
+    min_days: int = Field(..., ge=1)
+
+
+class CulturalRuleSpec(RuleSpec):
+    climates: Optional[List[ClimateProfile]] = None
+
+
+class RuleFileSpec(BaseModel):
+    version: str = Field(..., min_length=1)
+    core_documents: List[RuleSpec]
+    travel_mode: Dict[TravelMode, List[RuleSpec]]
+    travel_type: Dict[TravelType, List[RuleSpec]]
+    climate: Dict[ClimateProfile, List[RuleSpec]]
+    duration: List[DurationRuleSpec]
+    demographic: Dict[DemographicFlag, List[RuleSpec]]
+    cultural: List[CulturalRuleSpec]
+    padding: List[RuleSpec]
+
+    class Config:
+        extra = "forbid"
+
+
+class RuleCatalogError(ValueError):
+    pass
+
+
+def _table(groups: Mapping[str, List[RuleSpec]]) -> Mapping[str, Tuple[Rule, ...]]:
+    return MappingProxyType({key: tuple(spec.compile() for spec in specs) for key, specs in groups.items()})
+
+
+def compile_catalog(spec: RuleFileSpec) -> RuleCatalog:
+    duration = tuple(sorted(((rule.min_days, rule.compile()) for rule in spec.duration), key=lambda entry: entry[0]))
+    cultural = MappingProxyType(
+        {
+            climate: tuple(
+                rule.compile() for rule in spec.cultural if rule.climates is None or climate in rule.climates
+            )
+            for climate in get_args(ClimateProfile)
+        }
+    )
+    return RuleCatalog(
+        version=spec.version,
+        core_documents=tuple(rule.compile() for rule in spec.core_documents),
+        travel_mode=_table(spec.travel_mode),
+        travel_type=_table(spec.travel_type),
+        climate=_table(spec.climate),
+        duration=duration,
+        demographic=_table(spec.demographic),
+        cultural=cultural,
+        padding=tuple(rule.compile() for rule in spec.padding),
+        duration_thresholds=tuple(sorted({threshold for threshold, _ in duration} | BONUS_THRESHOLDS)),
+    )
+
+
+def load_catalog(path: Union[str, Path]) -> RuleCatalog:
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as exc:
+        raise RuleCatalogError(f"Cannot read rule file {path}: {exc}") from exc
+    try:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise RuleCatalogError("Loading YAML rule files requires PyYAML") from exc
+            data = yaml.safe_load(text)
+        else:
+            data = json.loads(text)
+        return compile_catalog(RuleFileSpec.parse_obj(data))
+    except RuleCatalogError:
+        raise
+    except (ValueError, ValidationError) as exc:
+        raise RuleCatalogError(f"Invalid rule file {path}: {exc}") from exc
+
+
+def configured_rules_path() -> Path:
+    return Path(get_settings().rules_path or DEFAULT_RULES_PATH)
+
+
+CatalogListener = Callable[[RuleCatalog, RuleCatalog], None]
+
+_current: Optional[RuleCatalog] = None
+_listeners: List[CatalogListener] = []
+_install_lock = Lock()
+
+
+def current_catalog() -> RuleCatalog:
+    global _current
+    if _current is None:
+        with _install_lock:
+            if _current is None:
+                _current = load_catalog(configured_rules_path())
+    return _current
+
+
+def on_catalog_change(listener: CatalogListener) -> None:
+    _listeners.append(listener)
+
+
+def install_catalog(catalog: RuleCatalog) -> bool:
+    global _current
+    previous = current_catalog()
+    with _install_lock:
+        previous = _current or previous
+        if catalog.version == previous.version:
+            if catalog == previous:
+                return False
+            raise RuleCatalogError(f"Rule catalog changed without bumping version {catalog.version!r}")
+        _current = catalog
+    logger.info("Installed rule catalog version %s (was %s)", catalog.version, previous.version)
+    for listener in _listeners:
+        listener(previous, catalog)
+    return True
+
+
+def reload_catalog(path: Union[str, Path, None] = None) -> bool:
+    return install_catalog(load_catalog(path or configured_rules_path()))
+
+
+async def watch_catalog(path: Union[str, Path], interval: float) -> None:
+    path = Path(path)
+
+    def modified_at() -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    last_modified = modified_at()
+    while True:
+        await asyncio.sleep(interval)
+        modified = modified_at()
+        if modified is None or modified == last_modified:
+            continue
+        last_modified = modified
+        try:
+            reload_catalog(path)
+        except RuleCatalogError:
+            logger.exception("Ignoring invalid rule file %s", path)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.write_behind import ignore_duplicate_keys
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def content_entry(content_id: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    return {"collection": "contents", "_id": content_id, "document": document}
+
+
+def content_update(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Upsert for a content document.
+
+    A full document also sets ``response`` on an existing delta document for the
+    same content id, so every content that a trip record references has its items.
+    """
+    if "response" not in document:
+        return {"$setOnInsert": document}
+    fields = {key: value for key, value in document.items() if key != "response"}
+    return {"$setOnInsert": fields, "$set": {"response": document["response"]}}
+
+
+def _pending_key(entry: Dict[str, Any]) -> Tuple[str, bool]:
+    return entry["_id"], "response" in entry["document"]
+
+
+def record_entry(document: Dict[str, Any]) -> Dict[str, Any]:
+    # Records keep one _id across replays, so a retried insert is a duplicate, not a copy.
+    return {"collection": "records", "document": {"_id": ObjectId(), **document}}
+
+
+def _count_lines(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with path.open("rb") as handle:
+        return sum(1 for line in handle if line.strip())
+
+
+@contextmanager
+def _file_lock(path: Path, blocking: bool = True) -> Iterator[bool]:
+    """Exclusive ``flock`` on ``path``; yields False if ``blocking`` is off and another process holds it."""
+    with path.open("a") as handle:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class PersistenceSpool:
+    """Append-only JSONL file of writes deferred while MongoDB is unavailable.
+
+    ``replay`` moves the spool aside and writes it back in batches through the
+    circuit breaker. Whatever is left when a batch fails stays in the replay file
+    and is retried first next time.
+
+    Worker processes can share one spool. Appends and the move are serialized with
+    an ``flock`` on ``<path>.lock``, and only one process replays at a time, holding
+    ``<path>.replay.lock``. File I/O runs in a thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        records: Any,
+        contents: Any,
+        breaker: CircuitBreaker,
+        batch_size: int = 500,
+    ) -> None:
+        self.path = Path(path)
+        self.replay_path = self.path.with_name(self.path.name + ".replay")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.replay_lock_path = self.path.with_name(self.path.name + ".replay.lock")
+        self.records = records
+        self.contents = contents
+        self.breaker = breaker
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+        self._pending_contents: Set[Tuple[str, bool]] = set()
+        self.backlog = _count_lines(self.path) + _count_lines(self.replay_path)
+        self.spooled = 0
+        self.replayed = 0
+        self.discarded = 0
+
+    async def append(self, entries: List[Dict[str, Any]]) -> None:
+        entries = [
+            entry
+            for entry in entries
+            if entry["collection"] != "contents"
+            or not {_pending_key(entry), (entry["_id"], True)} & self._pending_contents
+        ]
+        if not entries:
+            return
+        pending = {_pending_key(entry) for entry in entries if entry["collection"] == "contents"}
+        self._pending_contents.update(pending)
+        try:
+            await asyncio.to_thread(self._append_lines, [json_util.dumps(entry) for entry in entries])
+        except BaseException:
+            self._pending_contents.difference_update(pending)
+            raise
+        self.backlog += len(entries)
+        self.spooled += len(entries)
+
+    async def append_records(self, documents: List[Dict[str, Any]]) -> None:
+        await self.append([record_entry(document) for document in documents])
+
+    def _append_lines(self, lines: List[str]) -> None:
+        with _file_lock(self.lock_path), self.path.open("a", encoding="utf-8") as spool:
+            for line in lines:
+                spool.write(line)
+                spool.write("\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+
+    def _take_spool(self) -> bool:
+        if self.replay_path.exists():
+            return True
+        with _file_lock(self.lock_path):
+            if not self.path.exists():
+                return False
+            os.replace(self.path, self.replay_path)
+        return True
+
+    def pending(self) -> bool:
+        return self.path.exists() or self.replay_path.exists()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backlog": self.backlog,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "discarded": self.discarded,
+        }
+
+    async def replay(self) -> int:
+        async with self._lock:
+            with _file_lock(self.replay_lock_path, blocking=False) as locked:
+                if not locked:
+                    return 0
+                replayed = await self._replay()
+            # Other workers append to and replay the same files, so recount instead of trusting local counters.
+            self.backlog = await asyncio.to_thread(lambda: _count_lines(self.path) + _count_lines(self.replay_path))
+            if not self.backlog:
+                self._pending_contents.clear()
+            return replayed
+
+    async def _replay(self) -> int:
+        if not await asyncio.to_thread(self._take_spool):
+            return 0
+        replayed = 0
+        with self.replay_path.open("rb") as handle:
+            while True:
+                offset = handle.tell()
+                lines = [line for line in (handle.readline() for _ in range(self.batch_size)) if line]
+                if not lines:
+                    break
+                entries = self._parse(lines)
+                try:
+                    await self._write(entries)
+                except Exception as exc:
+                    if not isinstance(exc, CircuitOpenError):
+                        logger.warning("Replaying the persistence spool failed: %r", exc)
+                    self._keep_from(handle, offset)
+                    return replayed
+                replayed += len(entries)
+                self.replayed += len(entries)
+                self.backlog = max(0, self.backlog - len(lines))
+                self._pending_contents.difference_update(
+                    _pending_key(entry) for entry in entries if entry["collection"] == "contents"
+                )
+        self.replay_path.unlink()
+        if replayed:
+            logger.info("Replayed %d spooled writes to MongoDB", replayed)
+        return replayed
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if not self.pending():
+                continue
+            try:
+                await self.replay()
+            except Exception:
+                logger.exception("Persistence spool replay failed")
+
+    def _parse(self, lines: List[bytes]) -> List[Dict[str, Any]]:
+        entries = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json_util.loads(line))
+            except ValueError:
+                self.discarded += 1
+                logger.error("Discarding unreadable spool entry: %r", line[:200])
+        return entries
+
+    async def _write(self, entries: List[Dict[str, Any]]) -> None:
+        content_ops = [
+            UpdateOne({"_id": entry["_id"]}, content_update(entry["document"]), upsert=True)
+            for entry in entries
+            if entry["collection"] == "contents"
+        ]
+        records = [entry["document"] for entry in entries if entry["collection"] == "records"]
+        if content_ops:
+            await self.breaker.call(
+                lambda: ignore_duplicate_keys(self.contents.bulk_write(content_ops, ordered=False))
+            )
+        if records:
+            await self.breaker.call(lambda: ignore_duplicate_keys(self.records.insert_many(records, ordered=False)))
+
+    def _keep_from(self, handle: Any, offset: int) -> None:
+        handle.seek(offset)
+        remaining = self.replay_path.with_name(self.replay_path.name + ".tmp")
+        with remaining.open("wb") as target:
+            shutil.copyfileobj(handle, target)
+        os.replace(remaining, self.replay_path)
+
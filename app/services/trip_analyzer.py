@@ -1,341 +1,354 @@
+import hashlib
+import heapq
+import json
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from app.models.schemas import ChecklistItem, TripParameters
+from app.config import get_settings
+from app.models.schemas import (
+    ChecklistItem,
+    ChecklistResponse,
+    ItineraryParameters,
+    ItineraryResponse,
+    TravelerProfile,
+    TripChanges,
+    TripParameters,
+)
+from app.services.cache import LRUCache
+from app.services.metrics import span
+from app.services.rule_catalog import DEMOGRAPHIC_FLAGS, Rule, RuleCatalog, current_catalog, on_catalog_change
+
+
+class ChecklistEntry(NamedTuple):
+    name: str
+    category: str
+    score: float
+    rationale: List[str]
+    priority: str
+
+
+class TripShape(NamedTuple):
+    origin_climate: str
+    destination_climate: str
+    season: str
+    travel_type: str
+    travel_mode: str
+    duration_bucket: int
+    demographic_flags: FrozenSet[str]
+
+    @classmethod
+    def from_parameters(cls, params: TripParameters, catalog: Optional[RuleCatalog] = None) -> "TripShape":
+        return cls(
+            origin_climate=params.origin_climate,
+            destination_climate=params.destination_climate,
+            season=params.season,
+            travel_type=params.travel_type,
+            travel_mode=params.travel_mode,
+            duration_bucket=duration_bucket(params.duration_days, catalog),
+            demographic_flags=demographic_flags(params.traveler_demographics),
+        )
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "TripShape":
+        return cls(
+            origin_climate=document["origin_climate"],
+            destination_climate=document["destination_climate"],
+            season=document["season"],
+            travel_type=document["travel_type"],
+            travel_mode=document["travel_mode"],
+            duration_bucket=document["duration_bucket"],
+            demographic_flags=frozenset(document["demographic_flags"]),
+        )
+
+    def with_changes(self, changes: TripChanges, catalog: Optional[RuleCatalog] = None) -> "TripShape":
+        updates: Dict[str, Any] = {}
+        for field in ("origin_climate", "destination_climate", "season", "travel_type", "travel_mode"):
+            value = getattr(changes, field)
+            if value is not None:
+                updates[field] = value
+        if changes.duration_days is not None:
+            updates["duration_bucket"] = duration_bucket(changes.duration_days, catalog)
+        if changes.traveler_demographics is not None:
+            updates["demographic_flags"] = demographic_flags(changes.traveler_demographics)
+        return self._replace(**updates)
+
+    def changed_fields(self, other: "TripShape") -> FrozenSet[str]:
+        return frozenset(field for field, mine, theirs in zip(self._fields, self, other) if mine != theirs)
+
+    def to_document(self) -> Dict[str, Any]:
+        document = self._asdict()
+        document["demographic_flags"] = sorted(self.demographic_flags)
+        return document
+
+
+class LegShape(NamedTuple):
+    origin_climate: str
+    destination_climate: str
+    travel_mode: str
+
+
+class ItineraryShape(NamedTuple):
+    season: str
+    travel_type: str
+    duration_bucket: int
+    demographic_flags: FrozenSet[str]
+    legs: Tuple[LegShape, ...]
+
+    @classmethod
+    def from_parameters(cls, params: ItineraryParameters, catalog: Optional[RuleCatalog] = None) -> "ItineraryShape":
+        return cls(
+            season=params.season,
+            travel_type=params.travel_type,
+            duration_bucket=duration_bucket(sum(leg.duration_days for leg in params.legs), catalog),
+            demographic_flags=demographic_flags(params.traveler_demographics),
+            legs=tuple(LegShape(leg.origin_climate, leg.destination_climate, leg.travel_mode) for leg in params.legs),
+        )
+
+    def to_document(self) -> Dict[str, Any]:
+        document = self._asdict()
+        document["demographic_flags"] = sorted(self.demographic_flags)
+        document["legs"] = [leg._asdict() for leg in self.legs]
+        return document
+
+
+def duration_bucket(duration_days: int, catalog: Optional[RuleCatalog] = None) -> int:
+    bucket = 1
+    for threshold in (catalog or current_catalog()).duration_thresholds:
+        if duration_days >= threshold:
+            bucket = threshold
+    return bucket
+
+
+def demographic_flags(travelers: Iterable[TravelerProfile]) -> FrozenSet[str]:
+    flags = set()
+    for traveler in travelers:
+        if traveler.age_group == "senior":
+            flags.add("senior")
+        if traveler.has_special_needs:
+            flags.add("special_needs")
+        if traveler.age_group == "child":
+            flags.add("child")
+    return frozenset(flags)
+
+
+def score_bonus(same_climate: bool, bucket: int) -> float:
+    bonus = 0.0
+    if same_climate:
+        bonus -= 0.1
+    if bucket >= 10:
+        bonus += 0.2
+    if bucket >= 21:
+        bonus += 0.4
+    return bonus
+
+
+def checklist_id(shape: Union[TripShape, ItineraryShape], rules_version: Optional[str] = None) -> str:
+    canonical = json.dumps(
+        {"rules_version": rules_version or current_catalog().version, "shape": shape.to_document()},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+# Shape fields that a rule group or the score bonus reads. No rule depends on the season.
+RULE_FIELDS: FrozenSet[str] = frozenset(
+    {"origin_climate", "destination_climate", "travel_type", "travel_mode", "duration_bucket", "demographic_flags"}
+)
+
+
+PRIORITY_MIN_SCORES: Mapping[str, float] = {
+    "critical": 0.9,
+    "high": 0.75,
+    "medium": 0.5,
+    "nice-to-have": float("-inf"),
+}
+
+CachedChecklist = Tuple[Tuple[ChecklistItem, ...], Dict[str, int]]
+ScoredRule = Tuple[str, str, float, Tuple[str, ...]]
+LegRules = Tuple[Tuple[ScoredRule, ...], Tuple[ScoredRule, ...], Tuple[ScoredRule, ...]]
+
+_checklist_cache: LRUCache[CachedChecklist] = LRUCache(get_settings().checklist_cache_size)
+_leg_cache: LRUCache[LegRules] = LRUCache(get_settings().checklist_cache_size)
+
+
+def clear_checklist_cache(*_: RuleCatalog) -> None:
+    _checklist_cache.clear()
+    _leg_cache.clear()
+
+
+on_catalog_change(clear_checklist_cache)
 
 
 class TripAnalyzer:
-    def __init__(self, parameters: TripParameters) -> None:
+    def __init__(
+        self,
+        parameters: Optional[TripParameters] = None,
+        catalog: Optional[RuleCatalog] = None,
+        shape: Optional[TripShape] = None,
+    ) -> None:
+        if shape is None and parameters is None:
+            raise ValueError("TripAnalyzer requires trip parameters or a trip shape")
         self.params = parameters
+        self.catalog = catalog or current_catalog()
+        self.shape = shape or TripShape.from_parameters(parameters, self.catalog)
         self.items: Dict[str, Tuple[str, float, List[str]]] = {}
         self.category_counts = defaultdict(int)
+        self.bonus = self._score_bonus()
 
-    def generate_checklist(self) -> List[ChecklistItem]:
-        self._add_core_documents()
-        self._add_travel_mode_rules()
-        self._add_travel_type_rules()
-        self._add_climate_rules()
-        self._add_duration_rules()
-        self._add_demographic_rules()
-        self._add_cultural_rules()
+    def generate_checklist(self, reuse: Optional[Mapping[str, ChecklistItem]] = None) -> List[ChecklistItem]:
+        cache_key = (self.catalog.version, self.shape)
+        cached = _checklist_cache.get(cache_key)
+        if cached is not None:
+            items, category_counts = cached
+            self.category_counts.update(category_counts)
+            return list(items)
+        self._apply_rules()
         self._ensure_minimum_items()
-        prioritized = self._prioritize_items()
+        prioritized = self._prioritize_items(reuse)
+        _checklist_cache.put(cache_key, (tuple(prioritized), dict(self.category_counts)))
         return prioritized
 
-    def _add_item(self, name: str, category: str, base_score: float, rationale: List[str]) -> None:
-        key = name.lower()
-        bonus = 0.0
-        if self.params.destination_climate == self.params.origin_climate:
-            bonus -= 0.1
-        if self.params.duration_days >= 10:
-            bonus += 0.2
-        if self.params.duration_days >= 21:
-            bonus += 0.4
-        cumulative_score = base_score + bonus
+    def regenerate(self, previous: TripShape, previous_items: Sequence[ChecklistItem]) -> List[ChecklistItem]:
+        if not previous.changed_fields(self.shape) & RULE_FIELDS:
+            for item in previous_items:
+                self.category_counts[item.category] += 1
+            return list(previous_items)
+        return self.generate_checklist({item.name: item for item in previous_items})
+
+    def generate_entries(
+        self,
+        limit: Optional[int] = None,
+        categories: Optional[Collection[str]] = None,
+        min_priority: Optional[str] = None,
+    ) -> List[ChecklistEntry]:
+        self._apply_rules()
+        self._ensure_minimum_items()
+        return self._rank_entries(limit, categories, min_priority)
+
+    def _score_bonus(self) -> float:
+        return score_bonus(self.shape.destination_climate == self.shape.origin_climate, self.shape.duration_bucket)
+
+    def _add_item(self, name: str, category: str, base_score: float, rationale: Iterable[str]) -> None:
+        self._merge_item(name.lower(), category, base_score + self.bonus, rationale)
+
+    def _merge_item(self, key: str, category: str, cumulative_score: float, rationale: Iterable[str]) -> None:
         if key in self.items:
             existing_category, score, notes = self.items[key]
             merged_score = max(score, cumulative_score)
-            merged_notes = list({*notes, *rationale})
+            merged_notes = list(dict.fromkeys([*notes, *rationale]))
             self.items[key] = (existing_category, merged_score, merged_notes)
         else:
-            self.items[key] = (category, cumulative_score, rationale)
+            self.items[key] = (category, cumulative_score, list(rationale))
             self.category_counts[category] += 1
 
+    def _apply_rules(self) -> None:
+        self._add_core_documents()
+        self._add_travel_mode_rules()
+        self._add_travel_type_rules()
+        self._add_climate_rules()
+        self._add_duration_rules()
+        self._add_demographic_rules()
+        self._add_cultural_rules()
+
+    def _add_rules(self, rules: Iterable[Rule]) -> None:
+        for rule in rules:
+            self._add_item(*rule)
+
     def _add_core_documents(self) -> None:
-        essentials = [
-            ("Passport or government ID", "Documents", 1.0, ["Required for identification and border control"]),
-            ("Boarding passes or tickets", "Documents", 1.0, ["Needed for transit checkpoints"]),
-            ("Travel insurance details", "Documents", 0.9, ["Supports emergencies"]),
-            ("Payment cards and local currency", "Finance", 0.9, ["Covers purchases across modes"]),
-            ("Mobile phone and charger", "Electronics", 0.95, ["Core communication device"]),
-            ("Medications and prescriptions", "Health", 0.95, ["Maintain health regimen"]),
-            ("Basic toiletries", "Personal Care", 0.85, ["Daily hygiene essentials"]),
-            ("Reusable water bottle", "Health", 0.65, ["Hydration on the go"]),
-            ("Weather-ready outerwear", "Clothing", 0.8, ["Quick adaptation to changing conditions"]),
-        ]
-        for name, category, score, rationale in essentials:
-            self._add_item(name, category, score, rationale)
+        self._add_rules(self.catalog.core_documents)
 
     def _add_travel_type_rules(self) -> None:
-        travel_type = self.params.travel_type
-        if travel_type == "business":
-            business_items = [
-                ("Tailored suits or professional outfits", "Clothing", 0.95, ["Align with formal meetings"]),
-                ("Dress shirts per meeting", "Clothing", 0.9, ["Fresh attire for each session"]),
-                ("Formal shoes and belt", "Clothing", 0.85, ["Completes professional look"]),
-                ("Laptop with charger", "Electronics", 1.0, ["Work execution and presentations"]),
-                ("Presentation clicker and adapters", "Electronics", 0.8, ["Smooth presentation delivery"]),
-                ("Business cards and portfolio", "Documents", 0.9, ["Networking support"]),
-                ("Printed contracts and meeting notes", "Documents", 0.85, ["Reference materials"]),
-            ]
-            for item in business_items:
-                self._add_item(*item)
-        elif travel_type == "leisure":
-            leisure_items = [
-                ("Comfortable casual outfits", "Clothing", 0.85, ["Relaxed exploration"]),
-                ("Walking sneakers", "Clothing", 0.8, ["Long city days"]),
-                ("Camera or smartphone gimbal", "Electronics", 0.75, ["Capture experiences"]),
-                ("Books or games", "Entertainment", 0.6, ["Downtime enjoyment"]),
-                ("Snacks for transit", "Food", 0.55, ["Maintain energy en route"]),
-                ("Souvenir budget tracker", "Finance", 0.5, ["Manage discretionary spending"]),
-            ]
-            for item in leisure_items:
-                self._add_item(*item)
-        elif travel_type == "adventure":
-            adventure_items = [
-                ("Activity-specific gear", "Gear", 1.0, ["Core for adventure goals"]),
-                ("Hiking boots with grip", "Clothing", 0.95, ["Rough terrain stability"]),
-                ("Comprehensive first aid kit", "Health", 0.95, ["Respond to injuries"]),
-                ("Weatherproof technical layers", "Clothing", 0.9, ["Protection from elements"]),
-                ("GPS device and offline maps", "Navigation", 0.85, ["Route-finding"]),
-                ("Emergency whistle and multi-tool", "Safety", 0.85, ["Rapid response"]),
-                ("Headlamp or flashlight", "Safety", 0.8, ["Low-light visibility"]),
-            ]
-            for item in adventure_items:
-                self._add_item(*item)
-        elif travel_type == "family":
-            family_items = [
-                ("Diapers or pull-ups", "Childcare", 0.95, ["Young child essentials"]),
-                ("Formula and baby bottles", "Childcare", 0.9, ["Infant feeding"]),
-                ("Toys and comfort items", "Childcare", 0.75, ["Reduce travel stress"]),
-                ("Snacks and baby food", "Food", 0.85, ["Keep children fed"]),
-                ("Stroller or carrier", "Childcare", 0.8, ["Mobility support"]),
-                ("Child-safe medications", "Health", 0.85, ["Address minor ailments"]),
-                ("Car seat or booster", "Childcare", 0.8, ["Safety for transport"]),
-            ]
-            for item in family_items:
-                self._add_item(*item)
-        elif travel_type == "backpacking":
-            backpacking_items = [
-                ("Ultralight backpack", "Gear", 0.9, ["Comfort over distance"]),
-                ("Hostel lock and sleep sheet", "Safety", 0.8, ["Shared lodging security"]),
-                ("Compact toiletries", "Personal Care", 0.7, ["Space efficiency"]),
-                ("Multi-use clothing layers", "Clothing", 0.8, ["Versatility"]),
-                ("Budget tracking app", "Finance", 0.65, ["Control expenses"]),
-                ("Microfiber towel", "Personal Care", 0.7, ["Quick dry travel"]),
-                ("Water purification tablets", "Health", 0.75, ["Safe hydration"]),
-            ]
-            for item in backpacking_items:
-                self._add_item(*item)
+        self._add_rules(self.catalog.travel_type.get(self.shape.travel_type, ()))
 
     def _add_climate_rules(self) -> None:
-        climate = self.params.destination_climate
-        climate_items = {
-            "tropical": [
-                ("Broad-spectrum sunscreen", "Health", 0.9, ["UV protection"]),
-                ("Light breathable clothing", "Clothing", 0.8, ["Heat management"]),
-                ("Insect repellent", "Health", 0.85, ["Mosquito-heavy regions"]),
-                ("Packable rain jacket", "Clothing", 0.75, ["Sudden showers"]),
-                ("Humidity-safe toiletries", "Personal Care", 0.65, ["Prevent discomfort"]),
-            ],
-            "cold": [
-                ("Insulated jacket", "Clothing", 0.95, ["Thermal protection"]),
-                ("Base layers and thermals", "Clothing", 0.9, ["Effective layering"]),
-                ("Gloves and knit hat", "Clothing", 0.85, ["Protect extremities"]),
-                ("Moisturizer and lip balm", "Personal Care", 0.7, ["Prevent dryness"]),
-                ("Snow traction accessories", "Safety", 0.65, ["Icy surfaces"]),
-            ],
-            "desert": [
-                ("Sun hood or wide-brim hat", "Clothing", 0.9, ["Direct sun protection"]),
-                ("Breathable long sleeves", "Clothing", 0.8, ["Minimize heat gain"]),
-                ("Hydration bladder", "Health", 0.85, ["Carry sufficient water"]),
-                ("Electrolyte tablets", "Health", 0.7, ["Prevent dehydration"]),
-                ("Cooling towel", "Personal Care", 0.65, ["Temperature relief"]),
-            ],
-            "temperate": [
-                ("Layerable mid-weight jacket", "Clothing", 0.8, ["Adaptable conditions"]),
-                ("Compact umbrella", "Clothing", 0.65, ["Unpredictable showers"]),
-                ("Versatile footwear", "Clothing", 0.7, ["City and trail ready"]),
-                ("Neutral accessories", "Clothing", 0.55, ["Blend with varied outfits"]),
-            ],
-        }
-        for item in climate_items.get(climate, []):
-            self._add_item(*item)
+        self._add_rules(self.catalog.climate.get(self.shape.destination_climate, ()))
 
     def _add_travel_mode_rules(self) -> None:
-        mode = self.params.travel_mode
-        rules = {
-            "air": [
-                ("TSA-compliant liquids bag", "Documents", 0.8, ["Airport security ready"]),
-                ("Passport and ID holder", "Documents", 0.85, ["Speed through checkpoints"]),
-                ("Neck pillow and eye mask", "Comfort", 0.65, ["Rest on flight"]),
-                ("Charging cables for airport", "Electronics", 0.7, ["Leverage terminal outlets"]),
-                ("Offline boarding passes", "Documents", 0.75, ["Access without connectivity"]),
-            ],
-            "car": [
-                ("Road trip snacks", "Food", 0.55, ["Sustain energy while driving"]),
-                ("Car charger and mounts", "Electronics", 0.6, ["Navigation power"]),
-                ("Emergency car kit", "Safety", 0.8, ["Breakdown readiness"]),
-                ("Spare tire check and tools", "Safety", 0.7, ["Road safety"]),
-                ("Cooler for perishables", "Food", 0.55, ["Keep items fresh"]),
-            ],
-            "train": [
-                ("Comfortable walking shoes", "Clothing", 0.65, ["Station transfers"]),
-                ("Motion sickness medication", "Health", 0.6, ["Comfort on curves"]),
-                ("Cabin-friendly layers", "Clothing", 0.55, ["Varying car temperatures"]),
-                ("Power strip for shared outlets", "Electronics", 0.6, ["Limited sockets"]),
-            ],
-            "cruise": [
-                ("Motion sickness bands or meds", "Health", 0.7, ["Open water stability"]),
-                ("Cruise casual and formal wear", "Clothing", 0.65, ["Theme nights"]),
-                ("Cabin power strip", "Electronics", 0.6, ["Few outlets"]),
-                ("Deck-friendly footwear", "Clothing", 0.6, ["Non-slip surfaces"]),
-            ],
-        }
-        for item in rules.get(mode, []):
-            self._add_item(*item)
+        self._add_rules(self.catalog.travel_mode.get(self.shape.travel_mode, ()))
 
     def _add_duration_rules(self) -> None:
-        duration = self.params.duration_days
-        duration_rules = [
-            (duration >= 7, "Laundry kit or detergent", "Personal Care", 0.55, ["Wash clothing during longer stays"]),
-            (duration >= 14, "Extra rotation of outfits", "Clothing", 0.65, ["Reduce wear frequency"]),
-            (duration >= 21, "Supplemental medication supply", "Health", 0.7, ["Maintain regimen for long trips"]),
-        ]
-        for condition, name, category, score, rationale in duration_rules:
-            if condition:
-                self._add_item(name, category, score, rationale)
+        for threshold, rule in self.catalog.duration:
+            if self.shape.duration_bucket >= threshold:
+                self._add_item(*rule)
 
     def _add_demographic_rules(self) -> None:
-        for traveler in self.params.traveler_demographics:
-            if traveler.age_group == "senior":
-                self._add_item(
-                    "Mobility aids or comfort cushions",
-                    "Accessibility",
-                    0.7,
-                    ["Support for senior travelers"],
-                )
-                self._add_item(
-                    "Prescription list copies",
-                    "Health",
-                    0.75,
-                    ["Share with medical staff if needed"],
-                )
-            if traveler.has_special_needs:
-                self._add_item(
-                    "Accessibility documentation",
-                    "Accessibility",
-                    0.8,
-                    ["Coordinate accommodations and assistance"],
-                )
-                self._add_item(
-                    "Specialized equipment backups",
-                    "Accessibility",
-                    0.78,
-                    ["Redundancy for critical aids"],
-                )
-            if traveler.age_group == "child":
-                self._add_item(
-                    "Comfort blanket or plush",
-                    "Childcare",
-                    0.7,
-                    ["Reduce anxiety during transit"],
-                )
-                self._add_item(
-                    "Child headphones",
-                    "Entertainment",
-                    0.6,
-                    ["Protect hearing while providing media"],
-                )
+        for flag in DEMOGRAPHIC_FLAGS:
+            if flag in self.shape.demographic_flags:
+                self._add_rules(self.catalog.demographic.get(flag, ()))
 
     def _add_cultural_rules(self) -> None:
-        destination = self.params.destination_climate
-        modest_regions = {"desert", "tropical"}
-        if destination in modest_regions:
-            self._add_item(
-                "Modest attire options",
-                "Cultural",
-                0.6,
-                ["Respectful clothing for cultural norms"],
-            )
-        self._add_item(
-            "Local etiquette notes",
-            "Cultural",
-            0.55,
-            ["Prepared for greetings and tipping norms"],
-        )
-        self._add_item(
-            "Key phrases in local language",
-            "Cultural",
-            0.6,
-            ["Smooth daily interactions"],
-        )
+        self._add_rules(self.catalog.cultural.get(self.shape.destination_climate, ()))
 
     def _ensure_minimum_items(self) -> None:
-        general_padding = [
-            ("Travel-sized laundry bag", "Personal Care", 0.45, ["Organize worn clothing"]),
-            ("Extra device batteries", "Electronics", 0.45, ["Backup power"]),
-            ("Offline maps and guides", "Navigation", 0.5, ["Connectivity gaps"]),
-            ("Copies of important documents", "Documents", 0.5, ["Redundancy for safety"]),
-            ("Reusable shopping tote", "Convenience", 0.4, ["Carry purchases"]),
-            ("Compression packing cubes", "Convenience", 0.42, ["Organize luggage"]),
-            ("Hand sanitizer and wipes", "Health", 0.48, ["Hygiene in transit"]),
-            ("Portable power bank", "Electronics", 0.62, ["Extended device uptime"]),
-            ("Notebook and pen", "Documents", 0.4, ["Capture notes and addresses"]),
-            ("Small sewing kit", "Convenience", 0.35, ["Wardrobe repairs"]),
-            ("Earplugs", "Comfort", 0.38, ["Sleep in noisy settings"]),
-            ("Eye mask", "Comfort", 0.37, ["Improve rest in transit"]),
-            ("Travel pillow", "Comfort", 0.4, ["Neck support"],),
-            ("Healthy grab-and-go snacks", "Food", 0.42, ["Keep energy stable"]),
-            ("Refillable toiletry containers", "Personal Care", 0.4, ["Custom product sizes"]),
-            ("Shoe bags", "Convenience", 0.33, ["Protect clothing"]),
-            ("Travel clothesline", "Convenience", 0.36, ["Dry clothing quickly"]),
-            ("Waterproof pouches", "Safety", 0.37, ["Protect electronics"],),
-            ("Backup credit card", "Finance", 0.38, ["Redundancy for payments"]),
-            ("International adapter", "Electronics", 0.55, ["Charge devices abroad"]),
-            ("SIM card or eSIM plan", "Electronics", 0.5, ["Data connectivity"]),
-            ("Weather alert subscriptions", "Safety", 0.35, ["Timely updates"]),
-            ("Emergency contact card", "Safety", 0.4, ["Share critical info"]),
-            ("Reusable utensils", "Food", 0.3, ["Eco-friendly dining"]),
-            ("Collapsible daypack", "Convenience", 0.45, ["Daily outings"],),
-            ("Small first aid add-ons", "Health", 0.44, ["Bandages and pain relief"]),
-            ("Portable hotspot", "Electronics", 0.47, ["Reliable connectivity"]),
-            ("Secure money belt", "Safety", 0.5, ["Lower theft risk"]),
-            ("Travel-sized lint roller", "Clothing", 0.3, ["Maintain outfits"]),
-            ("Refillable hand soap sheets", "Health", 0.31, ["Hygiene flexibility"]),
-            ("Foldable rain poncho", "Clothing", 0.34, ["Unexpected showers"]),
-            ("Laundry stain remover pen", "Personal Care", 0.32, ["Quick fixes"]),
-            ("Multi-port charger", "Electronics", 0.46, ["Charge multiple devices"]),
-            ("Noise-cancelling headphones", "Entertainment", 0.52, ["Better focus and rest"]),
-            ("Travel-sized board games", "Entertainment", 0.28, ["Group fun"]),
-            ("Wellness supplements", "Health", 0.29, ["Immune support"]),
-            ("Seat-back organizer", "Comfort", 0.27, ["Keep essentials accessible"]),
-            ("Travel-safe cutlery", "Food", 0.26, ["Picnics and takeout"]),
-            ("Reusable straw", "Food", 0.25, ["Reduce waste"]),
-            ("Packing checklist printout", "Documents", 0.24, ["Track packed items"]),
-            ("Shoe deodorizer packets", "Personal Care", 0.23, ["Odor control"]),
-            ("Softshell jacket", "Clothing", 0.35, ["Versatile layer"]),
-            ("Foldable hat", "Clothing", 0.28, ["Sun or light rain coverage"]),
-            ("Bluetooth tracker tags", "Safety", 0.41, ["Locate belongings"]),
-            ("Handheld luggage scale", "Convenience", 0.33, ["Avoid overweight fees"]),
-            ("Travel-sized yoga mat", "Health", 0.27, ["Maintain routines"]),
-            ("Journal for reflection", "Entertainment", 0.22, ["Document experiences"]),
-            ("Travel detergent sheets", "Personal Care", 0.26, ["Compact laundry option"]),
-            ("Quick-dry base layers", "Clothing", 0.31, ["Comfort in varying climates"]),
-            ("Clip-on reading light", "Entertainment", 0.21, ["Read without disturbing others"]),
-            ("Emergency cash stash", "Finance", 0.34, ["Backup funds"]),
-        ]
-        while len(self.items) < 50 and general_padding:
-            name, category, score, rationale = general_padding.pop(0)
-            self._add_item(name, category, score, rationale)
-        trimmed_padding = general_padding[: max(0, 100 - len(self.items))]
-        for name, category, score, rationale in trimmed_padding:
+        padding = self.catalog.padding
+        position = 0
+        while len(self.items) < 50 and position < len(padding):
+            self._add_item(*padding[position])
+            position += 1
+        trimmed_padding = padding[position : position + max(0, 100 - len(self.items))]
+        for rule in trimmed_padding:
             if len(self.items) >= 100:
                 break
-            self._add_item(name, category, score, rationale)
+            self._add_item(*rule)
+
+    def _rank_entries(
+        self,
+        limit: Optional[int] = None,
+        categories: Optional[Collection[str]] = None,
+        min_priority: Optional[str] = None,
+    ) -> List[ChecklistEntry]:
+        candidates: Iterable[Tuple[str, Tuple[str, float, List[str]]]] = self.items.items()
+        if categories or min_priority:
+            minimum = PRIORITY_MIN_SCORES[min_priority or "nice-to-have"]
+            candidates = [
+                entry
+                for entry in candidates
+                if (not categories or entry[1][0] in categories) and entry[1][1] >= minimum
+            ]
+        if limit is None:
+            ranked = sorted(candidates, key=lambda entry: entry[1][1], reverse=True)
+        else:
+            # nlargest keeps sorted()'s order for equal scores, so the top-K matches a truncated full ranking.
+            ranked = heapq.nlargest(limit, candidates, key=lambda entry: entry[1][1])
+        return [
+            ChecklistEntry(name.title(), category, round(score, 2), rationale, self._priority_label(score))
+            for name, (category, score, rationale) in ranked
+        ]
 
-    def _prioritize_items(self) -> List[ChecklistItem]:
-        ranked = sorted(self.items.items(), key=lambda entry: entry[1][1], reverse=True)
+    def _prioritize_items(self, reuse: Optional[Mapping[str, ChecklistItem]] = None) -> List[ChecklistItem]:
         prioritized: List[ChecklistItem] = []
-        for name, (category, score, rationale) in ranked:
-            priority = self._priority_label(score)
+        for entry in self._rank_entries():
+            previous = reuse.get(entry.name) if reuse else None
+            if (
+                previous is not None
+                and previous.category == entry.category
+                and previous.score == entry.score
+                and previous.priority == entry.priority
+                and previous.rationale == entry.rationale
+            ):
+                prioritized.append(previous)
+                continue
             prioritized.append(
                 ChecklistItem(
-                    name=name.title(),
-                    category=category,
-                    score=round(score, 2),
-                    rationale=rationale,
-                    priority=priority,
+                    name=entry.name,
+                    category=entry.category,
+                    score=entry.score,
+                    rationale=entry.rationale,
+                    priority=entry.priority,
                 )
             )
         return prioritized
@@ -349,3 +362,98 @@ class TripAnalyzer:
         if score >= 0.5:
             return "medium"
         return "nice-to-have"
+
+
+class ItineraryAnalyzer(TripAnalyzer):
+    """Evaluates a multi-leg itinerary in one pass.
+
+    Core document, travel type, duration, demographic and padding rules run once for
+    the whole itinerary; duration uses the total of all legs. Travel mode, climate
+    and cultural rules run once per distinct leg and are cached per leg. Groups are
+    merged in the same order as for a single trip, so a one-leg itinerary gets the
+    checklist of the equivalent trip.
+    """
+
+    def __init__(
+        self,
+        parameters: Optional[ItineraryParameters] = None,
+        catalog: Optional[RuleCatalog] = None,
+        shape: Optional[ItineraryShape] = None,
+    ) -> None:
+        if shape is None and parameters is None:
+            raise ValueError("ItineraryAnalyzer requires itinerary parameters or an itinerary shape")
+        catalog = catalog or current_catalog()
+        super().__init__(catalog=catalog, shape=shape or ItineraryShape.from_parameters(parameters, catalog))
+        self.itinerary = parameters
+
+    def _score_bonus(self) -> float:
+        climates = {climate for leg in self.shape.legs for climate in (leg.origin_climate, leg.destination_climate)}
+        return score_bonus(len(climates) == 1, self.shape.duration_bucket)
+
+    def _apply_rules(self) -> None:
+        legs = [self._leg_rules(leg) for leg in dict.fromkeys(self.shape.legs)]
+        self._add_core_documents()
+        self._merge_leg_rules(legs, 0)
+        self._add_travel_type_rules()
+        self._merge_leg_rules(legs, 1)
+        self._add_duration_rules()
+        self._add_demographic_rules()
+        self._merge_leg_rules(legs, 2)
+
+    def _leg_rules(self, leg: LegShape) -> LegRules:
+        cache_key = (self.catalog.version, leg, self.shape.duration_bucket)
+        cached = _leg_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        bonus = score_bonus(leg.origin_climate == leg.destination_climate, self.shape.duration_bucket)
+
+        def scored(rules: Iterable[Rule]) -> Tuple[ScoredRule, ...]:
+            return tuple((rule.name.lower(), rule.category, rule.score + bonus, rule.rationale) for rule in rules)
+
+        leg_rules = (
+            scored(self.catalog.travel_mode.get(leg.travel_mode, ())),
+            scored(self.catalog.climate.get(leg.destination_climate, ())),
+            scored(self.catalog.cultural.get(leg.destination_climate, ())),
+        )
+        _leg_cache.put(cache_key, leg_rules)
+        return leg_rules
+
+    def _merge_leg_rules(self, legs: Sequence[LegRules], group: int) -> None:
+        for leg_rules in legs:
+            for rule in leg_rules[group]:
+                self._merge_item(*rule)
+
+
+def build_shape_response(shape: TripShape, items: List[ChecklistItem]) -> ChecklistResponse:
+    return ChecklistResponse(
+        destination=shape.destination_climate,
+        trip_type=shape.travel_type,
+        travel_mode=shape.travel_mode,
+        climate=shape.destination_climate,
+        items=items,
+    )
+
+
+def build_checklist_response(trip: TripParameters, catalog: Optional[RuleCatalog] = None) -> ChecklistResponse:
+    with span("rules"):
+        analyzer = TripAnalyzer(trip, catalog)
+        items = analyzer.generate_checklist()
+    with span("response_model"):
+        return ChecklistResponse(
+            destination=trip.destination_climate,
+            trip_type=trip.travel_type,
+            travel_mode=trip.travel_mode,
+            climate=trip.destination_climate,
+            items=items,
+        )
+
+
+def build_itinerary_response(
+    itinerary: ItineraryParameters,
+    catalog: Optional[RuleCatalog] = None,
+) -> ItineraryResponse:
+    with span("rules"):
+        analyzer = ItineraryAnalyzer(itinerary, catalog)
+        items = analyzer.generate_checklist()
+    with span("response_model"):
+        return ItineraryResponse(trip_type=itinerary.travel_type, legs=itinerary.legs, items=items)
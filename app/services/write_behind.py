@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+
+async def ignore_duplicate_keys(write: Awaitable[Any]) -> None:
+    try:
+        await write
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        collection: Any,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: str = "block",
+        spill_path: Optional[str] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        spool: Any = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("The spill overflow policy requires a spill path")
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.breaker = breaker
+        self.spool = spool
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_size)
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._closing = False
+        self._buffered = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + self._buffered
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+
+    async def enqueue(self, document: Dict[str, Any]) -> None:
+        self.enqueued += 1
+        if self._closing:
+            # The queue is draining for shutdown, so write this one directly.
+            await self._flush([document])
+            return
+        if self.overflow == "block":
+            await self._queue.put(document)
+            return
+        if not self._queue.full():
+            self._queue.put_nowait(document)
+            return
+        if self.overflow == "drop_oldest":
+            self._queue.get_nowait()
+            self.dropped += 1
+            self._queue.put_nowait(document)
+        else:
+            await self._spill([document])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.depth,
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "flush_seconds_total": round(self.flush_seconds_total, 6),
+            "last_flush_seconds": round(self.last_flush_seconds, 6),
+        }
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < self.batch_size:
+            if self._closing and self._queue.empty():
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            self._buffered = len(batch)
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._insert(batch)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            retryable = [batch[error["index"]] for error in errors if error.get("code") != DUPLICATE_KEY_ERROR]
+            self.flushed += exc.details.get("nInserted", 0)
+            self.failed += len(retryable)
+            if retryable and (self.spill_path or self.spool is not None):
+                await self._spill(retryable)
+            elif retryable:
+                first = next(error for error in errors if error.get("code") != DUPLICATE_KEY_ERROR)
+                logger.error(
+                    "Write-behind flush lost %d of %d checklists, first error: %s",
+                    len(retryable),
+                    len(batch),
+                    first.get("errmsg"),
+                )
+        except CircuitOpenError:
+            await self._spill(batch)
+        except Exception:
+            logger.exception("Write-behind flush of %d checklists failed", len(batch))
+            self.failed += len(batch)
+            if self.spill_path or self.spool is not None:
+                await self._spill(batch)
+        else:
+            self.flushed += len(batch)
+        elapsed = time.perf_counter() - started
+        self._buffered = 0
+        self.flushes += 1
+        self.last_flush_seconds = elapsed
+        self.flush_seconds_total += elapsed
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        if self.breaker is None:
+            await self.collection.insert_many(batch, ordered=False)
+        else:
+            await self.breaker.call(lambda: self.collection.insert_many(batch, ordered=False))
+
+    async def _spill(self, documents: List[Dict[str, Any]]) -> None:
+        if self.spool is not None:
+            await self.spool.append_records(documents)
+            self.spilled += len(documents)
+            return
+        if not self.spill_path:
+            self.dropped += len(documents)
+            return
+        await asyncio.to_thread(self._append_spill, [json_util.dumps(document) for document in documents])
+        self.spilled += len(documents)
+
+    def _append_spill(self, lines: List[str]) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as spill:
+            for line in lines:
+                spill.write(line)
+                spill.write("\n")
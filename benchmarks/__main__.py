@@ -0,0 +1,104 @@
+"""Benchmark the checklist generation path and compare runs.
+
+    python -m benchmarks run [--output results.json] [--only stages|load]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+    python -m benchmarks compat
+
+``run`` times each TripAnalyzer stage over a matrix of trip shapes, then drives
+``/api/checklist/generate`` in-process against a stub MongoDB collection.
+``compare`` exits non-zero when a latency statistic grows, or throughput drops,
+by more than the threshold. ``compat`` checks that the fast response mode
+(FAST_RESPONSES) returns byte-for-byte the same bodies as FastAPI serialization.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict
+
+from benchmarks.results import compare_results, environment, load_results, save_results
+
+
+def run(args: argparse.Namespace) -> None:
+    from app.main import app
+    from benchmarks.load import run_load
+    from benchmarks.stages import run_stage_benchmarks, trip_matrix
+
+    benchmarks: Dict[str, Any] = {}
+    if args.only in (None, "stages"):
+        print("running stage benchmarks", file=sys.stderr)
+        benchmarks["stages"] = run_stage_benchmarks(args.repeat)
+    if args.only in (None, "load"):
+        print("running load harness", file=sys.stderr)
+        benchmarks["load"] = asyncio.run(
+            run_load(app, trip_matrix(), args.requests, args.concurrency, args.cold, args.mongo_latency_ms / 1000)
+        )
+    results = {"environment": environment(), "benchmarks": benchmarks}
+    save_results(args.output, results)
+    for stage, stats in benchmarks.get("stages", {}).get("stages_us", {}).items():
+        print(f"{stage:<22} mean {stats['mean']:9.1f}us  p99 {stats['p99']:9.1f}us")
+    if "load" in benchmarks:
+        load = benchmarks["load"]
+        latency = load["latency_ms"]
+        print(
+            f"load: {load['throughput_rps']:.0f} req/s, p50 {latency['p50']:.2f}ms, "
+            f"p95 {latency['p95']:.2f}ms, p99 {latency['p99']:.2f}ms, errors {load['errors']}"
+        )
+    print(f"wrote {args.output}")
+
+
+def compare(args: argparse.Namespace) -> int:
+    regressions = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.metric}: {regression.baseline:.3f} -> {regression.current:.3f} "
+            f"({regression.change:+.1%})"
+        )
+    if not regressions:
+        print(f"no regressions above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def compat(args: argparse.Namespace) -> int:
+    from app.main import app
+    from benchmarks.compat import check_fast_responses
+    from benchmarks.stages import trip_matrix
+
+    report = asyncio.run(check_fast_responses(app, trip_matrix()))
+    print(f"{report['mismatches']} of {report['trips']} fast responses differ (encoder: {report['encoder']})")
+    if report["first_mismatch"] is not None:
+        print(f"first mismatching trip: {report['first_mismatch']}")
+    return 1 if report["mismatches"] else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and save the results as JSON")
+    run_parser.add_argument("--output", default="benchmark-results.json")
+    run_parser.add_argument("--only", choices=("stages", "load"))
+    run_parser.add_argument("--repeat", type=int, default=5, help="Passes over the trip matrix per stage")
+    run_parser.add_argument("--requests", type=int, default=2000)
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--cold", action="store_true", help="Clear the checklist cache before every request")
+    run_parser.add_argument("--mongo-latency-ms", type=float, default=0.0, help="Simulated round trip per write")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative slowdown")
+
+    commands.add_parser("compat", help="Check fast responses against FastAPI serialization")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compat":
+        sys.exit(compat(args))
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Dict, List, Sequence
+
+from fastapi import FastAPI
+
+from app.api import responses
+from app.api.routes import get_repository
+from app.models.schemas import TripParameters
+from app.services.checklist_render import clear_rendered_checklists
+from app.services.checklist_repository import ChecklistRepository
+from app.services.trip_analyzer import clear_checklist_cache
+from benchmarks.load import GENERATE_PATH, StubCollection, asgi_post
+
+
+async def _generate_bodies(app: FastAPI, bodies: Sequence[bytes], fast: bool) -> List[bytes]:
+    app.state.fast_responses = fast
+    clear_checklist_cache()
+    clear_rendered_checklists()
+    results = []
+    for body in bodies:
+        status, content = await asgi_post(app, GENERATE_PATH, body)
+        if status != 200:
+            raise RuntimeError(f"{GENERATE_PATH} answered {status}: {content[:200]!r}")
+        results.append(content)
+    return results
+
+
+async def check_fast_responses(app: FastAPI, trips: Sequence[TripParameters]) -> Dict[str, Any]:
+    """Compare fast-mode /generate bodies byte for byte with FastAPI's serialization."""
+    app.dependency_overrides[get_repository] = lambda: ChecklistRepository(
+        StubCollection(), contents=StubCollection()
+    )
+    saved_state = {key: getattr(app.state, key, None) for key in ("fast_responses", "response_store")}
+    app.state.response_store = None
+    bodies = [json.dumps(trip.dict(), default=str).encode() for trip in trips]
+    try:
+        expected = await _generate_bodies(app, bodies, fast=False)
+        actual = await _generate_bodies(app, bodies, fast=True)
+    finally:
+        app.dependency_overrides.pop(get_repository, None)
+        for key, value in saved_state.items():
+            setattr(app.state, key, value)
+    mismatches = [position for position, (left, right) in enumerate(zip(expected, actual)) if left != right]
+    return {
+        "encoder": "orjson" if responses.orjson is not None else "json",
+        "trips": len(trips),
+        "mismatches": len(mismatches),
+        "first_mismatch": trips[mismatches[0]].dict() if mismatches else None,
+    }
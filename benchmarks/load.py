@@ -0,0 +1,133 @@
+import asyncio
+import json
+import math
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+
+from app.api.routes import get_repository
+from app.models.schemas import TripParameters
+from app.services.checklist_render import clear_rendered_checklists
+from app.services.checklist_repository import ChecklistRepository
+from app.services.trip_analyzer import clear_checklist_cache
+from benchmarks.results import summarize
+
+GENERATE_PATH = "/api/checklist/generate"
+
+
+class StubCollection:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.writes = 0
+
+    async def _roundtrip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        await self._roundtrip()
+        self.writes += 1
+
+    async def insert_many(self, documents: Sequence[Dict[str, Any]], ordered: bool = True) -> None:
+        await self._roundtrip()
+        self.writes += len(documents)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> None:
+        await self._roundtrip()
+        self.writes += 1
+
+    async def bulk_write(self, operations: Sequence[Any], ordered: bool = True) -> None:
+        await self._roundtrip()
+        self.writes += len(operations)
+
+    async def find_one(self, query: Dict[str, Any], *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        await self._roundtrip()
+        return None
+
+    async def create_index(self, *args: Any, **kwargs: Any) -> None:
+        await self._roundtrip()
+
+
+async def asgi_post(app: FastAPI, path: str, body: bytes) -> Tuple[int, bytes]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        if messages:
+            return messages.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(bytes(message.get("body", b"")))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def run_load(
+    app: FastAPI,
+    trips: Sequence[TripParameters],
+    requests: int = 2000,
+    concurrency: int = 32,
+    cold: bool = False,
+    mongo_latency: float = 0.0,
+) -> Dict[str, Any]:
+    records = StubCollection(mongo_latency)
+    contents = StubCollection(mongo_latency)
+    app.dependency_overrides[get_repository] = lambda: ChecklistRepository(records, contents=contents)
+    bodies = [json.dumps(trip.dict(), default=str).encode() for trip in trips]
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_request
+        while next_request < requests:
+            body = bodies[next_request % len(bodies)]
+            next_request += 1
+            if cold:
+                clear_checklist_cache()
+                clear_rendered_checklists()
+            started = perf_counter()
+            status, _ = await asgi_post(app, GENERATE_PATH, body)
+            latencies.append(perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    try:
+        started = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = perf_counter() - started
+    finally:
+        app.dependency_overrides.pop(get_repository, None)
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "cold": cold,
+        "mongo_latency_ms": mongo_latency * 1000,
+        "errors": errors,
+        "duration_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else math.nan,
+        "latency_ms": summarize(latencies, 1000),
+        "mongo_writes": records.writes + contents.writes,
+    }
@@ -0,0 +1,80 @@
+import json
+import math
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Sequence, Union
+
+COMPARED_STATISTICS = ("mean", "p50", "p95", "p99")
+HIGHER_IS_BETTER_SUFFIXES = ("_rps",)
+
+
+class Regression(NamedTuple):
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    if not ordered:
+        return math.nan
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(samples: Sequence[float], scale: float = 1.0) -> Dict[str, float]:
+    ordered = sorted(sample * scale for sample in samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def flatten_metrics(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    metrics: Dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, f"{name}."))
+        elif key in COMPARED_STATISTICS or key.endswith(HIGHER_IS_BETTER_SUFFIXES):
+            metrics[name] = float(value)
+    return metrics
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def save_results(path: Union[str, Path], results: Dict[str, Any]) -> None:
+    Path(path).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Regression]:
+    before = flatten_metrics(baseline.get("benchmarks", {}))
+    after = flatten_metrics(current.get("benchmarks", {}))
+    regressions: List[Regression] = []
+    for metric in sorted(before.keys() & after.keys()):
+        old, new = before[metric], after[metric]
+        if not old or math.isnan(old) or math.isnan(new):
+            continue
+        change = (new - old) / old
+        worse = -change if metric.endswith(HIGHER_IS_BETTER_SUFFIXES) else change
+        if worse > threshold:
+            regressions.append(Regression(metric, old, new, change))
+    return regressions
@@ -0,0 +1,99 @@
+import itertools
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Tuple, get_args
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import render_json
+from app.models.schemas import (
+    ChecklistResponse,
+    ClimateProfile,
+    Season,
+    TravelerProfile,
+    TravelMode,
+    TravelType,
+    TripParameters,
+)
+from app.services.trip_analyzer import TripAnalyzer, build_checklist_response
+from benchmarks.results import summarize
+
+DURATIONS = (3, 9, 12, 25)
+TRAVELER_GROUPS: Tuple[Tuple[TravelerProfile, ...], ...] = (
+    (),
+    (TravelerProfile(age_group="senior"),),
+    (TravelerProfile(age_group="adult"), TravelerProfile(age_group="child", has_special_needs=True)),
+)
+STAGES = ("rule_application", "ensure_minimum_items", "prioritize_items", "response_model", "serialization")
+
+
+def trip_matrix() -> List[TripParameters]:
+    climates = get_args(ClimateProfile)
+    seasons = get_args(Season)
+    trips = []
+    combinations = itertools.product(
+        climates, get_args(TravelType), get_args(TravelMode), DURATIONS, TRAVELER_GROUPS
+    )
+    for position, (destination, travel_type, travel_mode, days, travelers) in enumerate(combinations):
+        trips.append(
+            TripParameters(
+                origin_climate=climates[position % len(climates)],
+                destination_climate=destination,
+                duration_days=days,
+                season=seasons[position % len(seasons)],
+                travel_type=travel_type,
+                travel_mode=travel_mode,
+                traveler_demographics=list(travelers),
+            )
+        )
+    return trips
+
+
+def _timed(samples: Dict[str, List[int]], stage: str, func: Callable[[], Any]) -> Any:
+    started = perf_counter_ns()
+    result = func()
+    samples[stage].append(perf_counter_ns() - started)
+    return result
+
+
+def run_stage_benchmarks(repeat: int = 5) -> Dict[str, Any]:
+    trips = trip_matrix()
+    samples: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+    totals: List[int] = []
+    for _ in range(repeat):
+        for trip in trips:
+            started = perf_counter_ns()
+            analyzer = TripAnalyzer(trip)
+            _timed(samples, "rule_application", analyzer._apply_rules)
+            _timed(samples, "ensure_minimum_items", analyzer._ensure_minimum_items)
+            items = _timed(samples, "prioritize_items", analyzer._prioritize_items)
+            response = _timed(
+                samples,
+                "response_model",
+                lambda: ChecklistResponse(
+                    destination=trip.destination_climate,
+                    trip_type=trip.travel_type,
+                    travel_mode=trip.travel_mode,
+                    climate=trip.destination_climate,
+                    items=items,
+                ),
+            )
+            _timed(samples, "serialization", lambda: render_json(jsonable_encoder(response)))
+            totals.append(perf_counter_ns() - started)
+
+    cached: List[int] = []
+    for trip in trips:
+        build_checklist_response(trip)
+    for _ in range(repeat):
+        for trip in trips:
+            started = perf_counter_ns()
+            build_checklist_response(trip)
+            cached.append(perf_counter_ns() - started)
+
+    microseconds = 1 / 1000
+    return {
+        "trips": len(trips),
+        "repeat": repeat,
+        "stages_us": {stage: summarize(samples[stage], microseconds) for stage in STAGES},
+        "uncached_total_us": summarize(totals, microseconds),
+        "cached_generate_us": summarize(cached, microseconds),
+    }
@@ -0,0 +1,23 @@
+import pytest
+
+
+class ContentCollection:
+    """Applies $setOnInsert and $set upserts the way MongoDB does."""
+
+    def __init__(self) -> None:
+        self.documents = {}
+
+    async def update_one(self, query, update, upsert=False):
+        document = self.documents.get(query["_id"])
+        if document is None:
+            document = self.documents[query["_id"]] = {"_id": query["_id"], **update.get("$setOnInsert", {})}
+        document.update(update.get("$set", {}))
+
+    async def find_one(self, query):
+        document = self.documents.get(query["_id"])
+        return dict(document) if document is not None else None
+
+
+@pytest.fixture
+def contents():
+    return ContentCollection()
@@ -0,0 +1,83 @@
+import itertools
+import random
+
+from app.services.batch_scoring import CLIMATES, PRIORITIES, SEASONS, TRAVEL_MODES, TRAVEL_TYPES, BatchScorer
+from app.services.rule_catalog import DEMOGRAPHIC_FLAGS, current_catalog
+from app.services.trip_analyzer import TripAnalyzer, TripShape, clear_checklist_cache
+
+RANKING_SAMPLE_SIZE = 5000
+CHECKLIST_SAMPLE_SIZE = 500
+SAMPLE_SEED = 20240517
+
+
+def duration_buckets(catalog):
+    return sorted({1, *catalog.duration_thresholds})
+
+
+def flag_sets():
+    return [
+        frozenset(flags)
+        for size in range(len(DEMOGRAPHIC_FLAGS) + 1)
+        for flags in itertools.combinations(DEMOGRAPHIC_FLAGS, size)
+    ]
+
+
+def all_shapes(catalog):
+    return [
+        TripShape(*fields)
+        for fields in itertools.product(
+            CLIMATES, CLIMATES, SEASONS, TRAVEL_TYPES, TRAVEL_MODES, duration_buckets(catalog), flag_sets()
+        )
+    ]
+
+
+def sample_shapes(catalog, size):
+    """A seeded sample of the input space, plus every duration bucket and flag set on one base shape."""
+    shapes = random.Random(SAMPLE_SEED).sample(all_shapes(catalog), size)
+    base = TripShape(CLIMATES[0], CLIMATES[1], SEASONS[0], TRAVEL_TYPES[0], TRAVEL_MODES[0], 1, frozenset())
+    shapes.extend(
+        base._replace(duration_bucket=bucket, demographic_flags=flags)
+        for bucket, flags in itertools.product(duration_buckets(catalog), flag_sets())
+    )
+    return shapes
+
+
+def as_tuples(checklists):
+    return [
+        [(item.name, item.category, item.score, tuple(item.rationale), item.priority) for item in checklist]
+        for checklist in checklists
+    ]
+
+
+def expected_checklists(shapes, catalog):
+    clear_checklist_cache()
+    return as_tuples(TripAnalyzer(catalog=catalog, shape=shape).generate_checklist() for shape in shapes)
+
+
+def test_batch_scorer_ranking_matches_trip_analyzer():
+    catalog = current_catalog()
+    shapes = sample_shapes(catalog, RANKING_SAMPLE_SIZE)
+    scorer = BatchScorer(catalog)
+    ranked = scorer.rank(shapes)
+    items, scores, priorities = ranked.items.tolist(), ranked.scores.tolist(), ranked.priorities.tolist()
+    for row, shape in enumerate(shapes):
+        count = int(ranked.counts[row])
+        actual = [
+            (scorer.item_names[item].title(), round(score, 2), PRIORITIES[priority])
+            for item, score, priority in zip(items[row][:count], scores[row][:count], priorities[row][:count])
+        ]
+        entries = TripAnalyzer(catalog=catalog, shape=shape).generate_entries()
+        assert actual == [(entry.name, entry.score, entry.priority) for entry in entries], shape
+
+
+def test_batch_scorer_checklists_match_trip_analyzer_on_sample():
+    catalog = current_catalog()
+    shapes = sample_shapes(catalog, CHECKLIST_SAMPLE_SIZE)
+    assert as_tuples(BatchScorer(catalog).checklists(shapes)) == expected_checklists(shapes, catalog)
+
+
+def test_batch_scorer_top_k_matches_truncated_checklists():
+    catalog = current_catalog()
+    shapes = sample_shapes(catalog, CHECKLIST_SAMPLE_SIZE)[::5]
+    expected = [checklist[:20] for checklist in expected_checklists(shapes, catalog)]
+    assert as_tuples(BatchScorer(catalog).checklists(shapes, top_k=20)) == expected
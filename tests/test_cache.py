@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.services.cache import ReadThroughCache, SingleFlight
+
+
+class Loader:
+    def __init__(self, value="checklist", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    async def scenario():
+        flights = SingleFlight()
+        loader = Loader()
+        callers = [asyncio.create_task(flights.do("id", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await asyncio.gather(*callers), loader.calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["checklist"] * 5
+    assert calls == 1
+
+
+def test_single_flight_shares_errors_and_runs_again_afterwards():
+    async def scenario():
+        flights = SingleFlight()
+        loader = Loader(error=LookupError("missing"))
+        callers = [asyncio.create_task(flights.do("id", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        again = Loader()
+        again.release.set()
+        return results, loader.calls, await flights.do("id", again)
+
+    results, calls, again = asyncio.run(scenario())
+    assert all(isinstance(result, LookupError) for result in results)
+    assert calls == 1
+    assert again == "checklist"
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+        loader = Loader()
+        leader = asyncio.create_task(flights.do("id", loader))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.do("id", loader)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers), loader.calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["checklist", "checklist"]
+    assert calls == 1
+
+
+def test_read_through_cache_loads_once_and_does_not_cache_misses():
+    async def scenario():
+        cache = ReadThroughCache(maxsize=8, ttl=60)
+        loader = Loader()
+        loader.release.set()
+        first = await asyncio.gather(*(cache.get("id", loader) for _ in range(3)))
+        second = await cache.get("id", loader)
+        missing = Loader(value=None)
+        missing.release.set()
+        await cache.get("other", missing)
+        await cache.get("other", missing)
+        cache.invalidate("id")
+        await cache.get("id", loader)
+        return first, second, loader.calls, missing.calls
+
+    first, second, calls, missing_calls = asyncio.run(scenario())
+    assert first == ["checklist"] * 3
+    assert second == "checklist"
+    assert calls == 2
+    assert missing_calls == 2
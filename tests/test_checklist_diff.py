@@ -0,0 +1,21 @@
+from app.services.checklist_diff import apply_checklist_delta, checklist_delta, diff_checklists
+from app.services.trip_analyzer import TripAnalyzer, TripShape, clear_checklist_cache
+
+AIR = TripShape("temperate", "tropical", "summer", "leisure", "air", 1, frozenset())
+TRAIN = AIR._replace(travel_mode="train")
+
+
+def test_delta_holds_only_changed_items_when_new_shape_is_cached():
+    clear_checklist_cache()
+    TripAnalyzer(shape=TRAIN).generate_checklist()
+    previous = TripAnalyzer(shape=AIR).generate_checklist()
+    current = TripAnalyzer(shape=TRAIN).regenerate(AIR, previous)
+
+    diff = diff_checklists(previous, current)
+    delta = checklist_delta(previous, current)
+    changed = {item["name"] for item in delta["changed"]}
+
+    assert changed == {item.name for item in diff.added} | {change.name for change in diff.rescored}
+    assert len(changed) < len(current)
+    base = {"items": [item.dict() for item in previous]}
+    assert apply_checklist_delta(base, delta, TRAIN)["items"] == [item.dict() for item in current]
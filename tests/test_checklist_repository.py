@@ -0,0 +1,51 @@
+import asyncio
+
+from app.models.schemas import TripParameters
+from app.services.checklist_diff import checklist_delta
+from app.services.checklist_repository import ChecklistRepository, _stored_contents
+from app.services.rule_catalog import current_catalog
+from app.services.trip_analyzer import (
+    TripAnalyzer,
+    TripShape,
+    build_checklist_response,
+    build_shape_response,
+    checklist_id,
+)
+from benchmarks.load import StubCollection
+
+
+def trip(travel_mode):
+    return TripParameters(
+        origin_climate="temperate",
+        destination_climate="tropical",
+        duration_days=5,
+        season="summer",
+        travel_type="leisure",
+        travel_mode=travel_mode,
+        traveler_demographics=[{"age_group": "adult"}],
+    )
+
+
+async def patch_then_generate(repo, catalog):
+    air = trip("air")
+    base_id = await repo.save_checklist(air, build_checklist_response(air, catalog), catalog)
+    base = await repo.find_content(base_id)
+    previous_shape = TripShape.from_document(base["shape"])
+    shape = previous_shape._replace(travel_mode="car")
+    previous_items = build_checklist_response(air, catalog).items
+    items = TripAnalyzer(catalog=catalog, shape=shape).regenerate(previous_shape, previous_items)
+    delta = checklist_delta(previous_items, items)
+    await repo.save_revision(base, shape, build_shape_response(shape, items), delta, {}, {}, catalog)
+    car = trip("car")
+    await repo.save_checklist(car, build_checklist_response(car, catalog), catalog)
+    return checklist_id(shape, catalog.version)
+
+
+def test_saving_a_trip_fills_in_a_delta_content(contents):
+    catalog = current_catalog()
+    _stored_contents.clear()
+    repo = ChecklistRepository(StubCollection(), contents=contents)
+    content_id = asyncio.run(patch_then_generate(repo, catalog))
+    stored = contents.documents[content_id]
+    assert "delta" in stored
+    assert stored["response"] == build_checklist_response(trip("car"), catalog).dict()
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def succeed():
+    return "ok"
+
+
+async def fail():
+    raise ConnectionError("MongoDB is down")
+
+
+async def hang():
+    await asyncio.sleep(1)
+
+
+def run(breaker, operation):
+    return asyncio.run(breaker.call(operation))
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker(error_threshold=3, clock=Clock())
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            run(breaker, fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        run(breaker, succeed)
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opened"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(error_threshold=2, clock=Clock())
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    run(breaker, succeed)
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_trial_success_closes_the_breaker():
+    clock = Clock()
+    breaker = CircuitBreaker(error_threshold=1, reset_timeout=10, clock=clock)
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.0)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_trial_failure_opens_the_breaker_again():
+    clock = Clock()
+    breaker = CircuitBreaker(error_threshold=1, reset_timeout=10, clock=clock)
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    clock.now = 10
+    with pytest.raises(ConnectionError):
+        run(breaker, fail)
+    assert breaker.state == OPEN
+    clock.now = 15
+    with pytest.raises(CircuitOpenError):
+        run(breaker, succeed)
+    clock.now = 20
+    assert run(breaker, succeed) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_slow_successes_count_as_failures():
+    breaker = CircuitBreaker(error_threshold=2, latency_threshold=0.5, clock=Clock())
+    breaker.record_success(0.6)
+    breaker.record_success(0.7)
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+
+def test_calls_past_the_timeout_fail():
+    breaker = CircuitBreaker(error_threshold=1, call_timeout=0.01, clock=Clock())
+    with pytest.raises(asyncio.TimeoutError):
+        run(breaker, hang)
+    assert breaker.state == OPEN
@@ -0,0 +1,115 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from app.api.compression import CompressionMiddleware, negotiate_encoding
+from app.api.responses import etag_matches
+from app.api.routes import get_repository
+from app.main import app
+from app.services.checklist_repository import ChecklistRepository
+from benchmarks.load import StubCollection
+
+TRIP = {
+    "origin_climate": "temperate",
+    "destination_climate": "tropical",
+    "duration_days": 8,
+    "season": "summer",
+    "travel_type": "leisure",
+    "travel_mode": "air",
+    "traveler_demographics": [{"age_group": "adult"}],
+}
+GENERATE_PATH = "/api/checklist/generate"
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_repository] = lambda: ChecklistRepository(StubCollection(), contents=StubCollection())
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_repository, None)
+
+
+def test_gzip_response_has_vary_and_weak_etag(client):
+    response = client.post(GENERATE_PATH, json=TRIP, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].startswith('W/"')
+    assert response.json()["items"]
+
+
+def test_client_without_accept_encoding_gets_an_uncompressed_body(client):
+    del client.headers["accept-encoding"]
+    response = client.post(GENERATE_PATH, json=TRIP)
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].startswith('"')
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert response.json()["items"]
+
+
+def test_identity_and_gzip_bodies_match(client):
+    plain = client.post(GENERATE_PATH, json=TRIP, headers={"Accept-Encoding": "identity"})
+    compressed = client.post(GENERATE_PATH, json=TRIP, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert compressed.content == plain.content
+    assert compressed.headers["etag"] == f"W/{plain.headers['etag']}"
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_weak_etag_in_if_none_match_gets_304(client, accept_encoding):
+    first = client.post(GENERATE_PATH, json=TRIP, headers={"Accept-Encoding": "gzip"})
+    weak = first.headers["etag"]
+    assert weak.startswith("W/")
+    response = client.post(
+        GENERATE_PATH, json=TRIP, headers={"Accept-Encoding": accept_encoding, "If-None-Match": weak}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == weak[2:]
+
+
+def test_negotiate_encoding_honours_quality_values():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip, br;q=0.5", encodings=("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*", encodings=("zstd", "gzip")) == "zstd"
+    assert negotiate_encoding("*, zstd;q=0", encodings=("zstd", "gzip")) == "gzip"
+
+
+def test_etag_matches_strong_weak_lists_and_wildcard():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"other", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_compressed_bodies_are_cached_by_etag():
+    body = b'{"items": [' + b'"passport",' * 200 + b'"visa"]}'
+
+    async def endpoint(scope, receive, send):
+        response = Response(body, media_type="application/json", headers={"ETag": '"checklist"'})
+        await response(scope, receive, send)
+
+    middleware = CompressionMiddleware(endpoint, minimum_size=100)
+    client = TestClient(middleware)
+    responses = [client.get("/", headers={"Accept-Encoding": "gzip"}) for _ in range(2)]
+    assert [response.content for response in responses] == [body, body]
+    assert middleware.cache.hits == 1
+    assert gzip.decompress(middleware.cache.get(('"checklist"', "gzip"))) == body
+
+
+@pytest.mark.parametrize("body, media_type", [(b"{}", "application/json"), (b"x" * 2000, "image/png")])
+def test_small_and_non_json_bodies_are_not_compressed(body, media_type):
+    client = TestClient(CompressionMiddleware(Response(body, media_type=media_type), minimum_size=100))
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == body
@@ -0,0 +1,11 @@
+import asyncio
+
+from app.main import app
+from benchmarks.compat import check_fast_responses
+from benchmarks.stages import trip_matrix
+
+
+def test_fast_responses_match_fastapi_serialization_byte_for_byte():
+    report = asyncio.run(check_fast_responses(app, trip_matrix()))
+    assert report["encoder"] == "orjson"
+    assert report["mismatches"] == 0, report["first_mismatch"]
@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import get_repository
+from app.main import app
+from app.services.checklist_repository import ChecklistRepository, _stored_contents
+from benchmarks.load import StubCollection
+
+TRIP = {
+    "origin_climate": "temperate",
+    "destination_climate": "tropical",
+    "duration_days": 8,
+    "season": "summer",
+    "travel_type": "leisure",
+    "travel_mode": "air",
+    "traveler_demographics": [{"age_group": "adult"}],
+}
+
+
+@pytest.fixture
+def client(contents):
+    _stored_contents.clear()
+    app.dependency_overrides[get_repository] = lambda: ChecklistRepository(StubCollection(), contents=contents)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_repository, None)
+
+
+def test_stored_checklists_are_read_and_patched_by_path_id(client):
+    generated = client.post("/api/checklist/generate", json=TRIP)
+    content_id = generated.headers["x-checklist-id"]
+
+    stored = client.get(f"/api/checklist/{content_id}")
+    assert stored.status_code == 200
+    assert stored.headers["x-checklist-id"] == content_id
+    assert stored.json() == generated.json()
+
+    patched = client.patch(f"/api/checklist/{content_id}", json={"travel_mode": "train"})
+    assert patched.status_code == 200
+    assert patched.json()["base_checklist_id"] == content_id
+    assert patched.json()["checklist_id"] == patched.headers["x-checklist-id"] != content_id
+
+
+def test_malformed_path_ids_are_rejected_under_the_public_name(client):
+    response = client.get("/api/checklist/not-a-hash")
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["path", "checklist_id"]
@@ -0,0 +1,126 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.spool import PersistenceSpool, _file_lock, content_entry, record_entry
+from benchmarks.load import StubCollection
+
+
+class FlakyCollection(StubCollection):
+    """Fails every insert_many after the first ``healthy_calls``."""
+
+    def __init__(self, healthy_calls=0):
+        super().__init__()
+        self.healthy_calls = healthy_calls
+        self.inserted = []
+
+    async def insert_many(self, documents, ordered=True):
+        if self.healthy_calls <= 0:
+            raise AutoReconnect("MongoDB is down")
+        self.healthy_calls -= 1
+        await super().insert_many(documents, ordered)
+        self.inserted.extend(documents)
+
+
+def make_spool(tmp_path, records=None, contents=None, batch_size=500):
+    return PersistenceSpool(
+        str(tmp_path / "checklists.spool.jsonl"),
+        records if records is not None else FlakyCollection(healthy_calls=100),
+        contents if contents is not None else StubCollection(),
+        CircuitBreaker(error_threshold=100),
+        batch_size=batch_size,
+    )
+
+
+def records(count):
+    return [{"checklist_id": f"id-{n}"} for n in range(count)]
+
+
+def test_replay_writes_spooled_records_and_contents(tmp_path):
+    spool = make_spool(tmp_path)
+
+    async def scenario():
+        await spool.append_records(records(3))
+        await spool.append([content_entry("id-0", {"response": {"items": []}})])
+        backlog = spool.backlog
+        return backlog, await spool.replay()
+
+    backlog, replayed = asyncio.run(scenario())
+    assert backlog == 4
+    assert replayed == 4
+    assert [document["checklist_id"] for document in spool.records.inserted] == ["id-0", "id-1", "id-2"]
+    assert spool.contents.writes == 1
+    assert spool.backlog == 0
+    assert not spool.pending()
+
+
+def test_duplicate_contents_are_spooled_once(tmp_path):
+    spool = make_spool(tmp_path)
+    entry = content_entry("id-0", {"response": {"items": []}})
+    asyncio.run(spool.append([entry]))
+    asyncio.run(spool.append([entry]))
+    assert spool.stats()["spooled"] == 1
+
+
+def test_failed_batch_keeps_the_rest_for_the_next_replay(tmp_path):
+    collection = FlakyCollection(healthy_calls=1)
+    spool = make_spool(tmp_path, records=collection, batch_size=2)
+
+    async def scenario():
+        await spool.append_records(records(5))
+        first = await spool.replay()
+        remaining = spool.replay_path.read_text().splitlines()
+        collection.healthy_calls = 100
+        return first, remaining, await spool.replay()
+
+    first, remaining, second = asyncio.run(scenario())
+    assert first == 2
+    assert len(remaining) == 3
+    assert second == 3
+    assert [document["checklist_id"] for document in collection.inserted] == [f"id-{n}" for n in range(5)]
+    assert not spool.pending()
+
+
+def test_unreadable_lines_are_discarded(tmp_path):
+    spool = make_spool(tmp_path)
+
+    async def scenario():
+        await spool.append_records(records(1))
+        with spool.path.open("a", encoding="utf-8") as handle:
+            handle.write('{"collection": "records", "document": \n')
+        await spool.append_records(records(2)[1:])
+        return await spool.replay()
+
+    assert asyncio.run(scenario()) == 2
+    assert spool.stats()["discarded"] == 1
+    assert len(spool.records.inserted) == 2
+
+
+def test_only_one_process_replays_a_shared_spool(tmp_path):
+    spool = make_spool(tmp_path)
+    other_worker = make_spool(tmp_path)
+
+    async def scenario():
+        await spool.append([record_entry(document) for document in records(2)])
+        with _file_lock(other_worker.replay_lock_path) as locked:
+            assert locked
+            skipped = await spool.replay()
+        return skipped, await spool.replay()
+
+    skipped, replayed = asyncio.run(scenario())
+    assert skipped == 0
+    assert replayed == 2
+
+
+def test_backlog_counts_entries_spooled_by_other_workers(tmp_path):
+    spool = make_spool(tmp_path, records=FlakyCollection(healthy_calls=0))
+    other_worker = make_spool(tmp_path)
+
+    async def scenario():
+        await other_worker.append_records(records(3))
+        await spool.replay()
+
+    asyncio.run(scenario())
+    assert spool.backlog == 3
+    assert spool.pending()
@@ -0,0 +1,52 @@
+import pytest
+
+from app.models.schemas import TripParameters
+from app.services.trip_analyzer import TripAnalyzer, TripShape, clear_checklist_cache
+
+
+def trip(*age_groups):
+    return TripParameters(
+        origin_climate="temperate",
+        destination_climate="tropical",
+        duration_days=5,
+        season="summer",
+        travel_type="leisure",
+        travel_mode="air",
+        traveler_demographics=[{"age_group": age_group} for age_group in age_groups],
+    )
+
+
+@pytest.mark.parametrize("age_groups", [("child", "senior"), ("senior", "child")])
+def test_demographic_rules_run_in_flag_order_not_traveler_order(age_groups):
+    # Demographic rules run senior, special needs, child, whatever order travelers are listed in.
+    # Before checklists were memoized per trip shape, a child listed first put child items
+    # ahead of senior items with the same score.
+    clear_checklist_cache()
+    items = TripAnalyzer(trip(*age_groups)).generate_checklist()
+    assert [item.name for item in items if item.score == 0.7] == [
+        "Charging Cables For Airport",
+        "Mobility Aids Or Comfort Cushions",
+        "Comfort Blanket Or Plush",
+    ]
+
+
+AIR = TripShape("temperate", "tropical", "summer", "leisure", "air", 1, frozenset())
+
+
+def test_regenerate_keeps_items_when_no_rule_reads_the_changed_field():
+    previous = TripAnalyzer(shape=AIR).generate_checklist()
+    items = TripAnalyzer(shape=AIR._replace(season="winter")).regenerate(AIR, previous)
+    assert all(item is old for item, old in zip(items, previous))
+
+
+def test_regenerate_reuses_only_items_with_identical_rationale_lists():
+    clear_checklist_cache()
+    previous = TripAnalyzer(shape=AIR).generate_checklist()
+    train = AIR._replace(travel_mode="train")
+    passport = previous[0]
+    # Same rationale strings as a set, different as a list.
+    previous[0] = passport.copy(update={"rationale": passport.rationale * 2})
+    items = TripAnalyzer(shape=train).regenerate(AIR, previous)
+    by_name = {item.name: item for item in items}
+    assert by_name[passport.name].rationale == passport.rationale
+    assert by_name[previous[1].name] is previous[1]
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.services.write_behind import WriteBehindQueue
+from benchmarks.load import StubCollection
+
+
+class RecordingCollection(StubCollection):
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        await super().insert_many(documents, ordered)
+        self.batches.append(list(documents))
+
+
+class FailingCollection(StubCollection):
+    async def insert_many(self, documents, ordered=True):
+        raise BulkWriteError(
+            {
+                "nInserted": len(documents) - 1,
+                "writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}],
+            }
+        )
+
+
+def documents(count):
+    return [{"n": n} for n in range(count)]
+
+
+def test_flushes_full_batches_without_waiting_for_the_interval():
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, batch_size=3, flush_interval=1)
+        await queue.start()
+        for document in documents(6):
+            await queue.enqueue(document)
+        await asyncio.sleep(0.05)
+        batches = [len(batch) for batch in collection.batches]
+        await queue.stop()
+        return batches
+
+    assert asyncio.run(scenario()) == [3, 3]
+
+
+def test_flushes_partial_batches_after_the_interval():
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, batch_size=100, flush_interval=0.05)
+        await queue.start()
+        for document in documents(2):
+            await queue.enqueue(document)
+        await asyncio.sleep(0.2)
+        batches = list(collection.batches)
+        await queue.stop()
+        return batches
+
+    assert asyncio.run(scenario()) == [documents(2)]
+
+
+def test_block_waits_for_room_in_the_queue():
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, max_size=2, batch_size=1, flush_interval=0.01, overflow="block")
+        for document in documents(2):
+            await queue.enqueue(document)
+        blocked = asyncio.create_task(queue.enqueue({"n": 2}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        await queue.start()
+        await blocked
+        await queue.stop()
+        return collection.batches, queue.dropped
+
+    batches, dropped = asyncio.run(scenario())
+    assert [document for batch in batches for document in batch] == documents(3)
+    assert dropped == 0
+
+
+def test_drop_oldest_discards_the_oldest_queued_document():
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, max_size=2, batch_size=10, overflow="drop_oldest")
+        for document in documents(3):
+            await queue.enqueue(document)
+        await queue.start()
+        await queue.stop()
+        return collection.batches, queue.dropped
+
+    batches, dropped = asyncio.run(scenario())
+    assert batches == [[{"n": 1}, {"n": 2}]]
+    assert dropped == 1
+
+
+def test_spill_appends_overflow_to_the_spill_file(tmp_path):
+    spill_path = tmp_path / "checklists.spill.jsonl"
+
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, max_size=2, batch_size=10, overflow="spill", spill_path=str(spill_path))
+        for document in documents(3):
+            await queue.enqueue(document)
+        await queue.start()
+        await queue.stop()
+        return collection.batches, queue.spilled
+
+    batches, spilled = asyncio.run(scenario())
+    assert batches == [documents(2)]
+    assert spilled == 1
+    assert [json.loads(line) for line in spill_path.read_text().splitlines()] == [{"n": 2}]
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(StubCollection(), overflow="discard")
+
+
+def test_stop_drains_the_queue():
+    async def scenario():
+        collection = RecordingCollection()
+        queue = WriteBehindQueue(collection, batch_size=4, flush_interval=1)
+        await queue.start()
+        for document in documents(10):
+            await queue.enqueue(document)
+        await queue.stop()
+        return collection.batches, queue.stats()
+
+    batches, stats = asyncio.run(scenario())
+    assert [document for batch in batches for document in batch] == documents(10)
+    assert stats["flushed"] == 10
+    assert stats["queue_depth"] == 0
+
+
+def test_saves_during_shutdown_are_written_directly():
+    async def scenario():
+        collection = RecordingCollection(latency=0.05)
+        queue = WriteBehindQueue(collection, batch_size=10, flush_interval=1)
+        await queue.start()
+        await queue.enqueue({"n": 0})
+        stopping = asyncio.create_task(queue.stop())
+        await asyncio.sleep(0)
+        await queue.enqueue({"n": 1})
+        await stopping
+        return collection.batches
+
+    batches = asyncio.run(scenario())
+    assert sorted(document["n"] for batch in batches for document in batch) == [0, 1]
+
+
+def test_failed_inserts_without_a_spill_target_are_logged(caplog):
+    async def scenario():
+        queue = WriteBehindQueue(FailingCollection(), batch_size=2, flush_interval=1)
+        await queue.start()
+        for document in documents(2):
+            await queue.enqueue(document)
+        await queue.stop()
+        return queue.stats()
+
+    with caplog.at_level(logging.ERROR, logger="app.services.write_behind"):
+        stats = asyncio.run(scenario())
+    assert stats["failed"] == 1
+    assert stats["flushed"] == 1
+    assert "lost 1 of 2 checklists" in caplog.text
+    assert "Document failed validation" in caplog.text